@@ -6,6 +6,8 @@ CREATE TABLE employees (
   id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
   name VARCHAR(255) NOT NULL,
   email VARCHAR(255) UNIQUE NOT NULL,
+  -- Email у нижньому регістрі для перевірки існуючих співробітників без урахування регістру
+  email_normalized VARCHAR(255) GENERATED ALWAYS AS (lower(email)) STORED,
   role VARCHAR(100) NOT NULL,
   department VARCHAR(100),
   start_date DATE NOT NULL,
@@ -14,6 +16,8 @@ CREATE TABLE employees (
   resources_needed TEXT[],
   status VARCHAR(50) DEFAULT 'onboarding_started',
   overall_progress INTEGER DEFAULT 0 CHECK (overall_progress >= 0 AND overall_progress <= 100),
+  tasks_total INTEGER DEFAULT 0 CHECK (tasks_total >= 0),
+  tasks_completed INTEGER DEFAULT 0 CHECK (tasks_completed >= 0),
   created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
   updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -67,9 +71,15 @@ CREATE TABLE qa_interactions (
   answer TEXT NOT NULL,
   confidence FLOAT CHECK (confidence >= 0.0 AND confidence <= 1.0),
   sources TEXT[] DEFAULT '{}',
+  role VARCHAR(100),
+  answer_source VARCHAR(50), -- cache, vector, knowledge_base
+  latency_ms INTEGER CHECK (latency_ms >= 0),
   was_helpful BOOLEAN,
   feedback TEXT,
-  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  -- Порядковий номер та час запису в БД - водяний знак агрегації qa_analytics_rollups
+  seq BIGSERIAL,
+  ingested_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
 -- Таблиця менторів
@@ -102,6 +112,62 @@ CREATE TABLE integrations (
   updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Зведення онбордингу для HR дашборду (інкрементально оновлюється тригерами,
+-- замість GROUP BY представлення employee_onboarding_summary на кожне читання)
+CREATE TABLE onboarding_summary (
+  employee_id UUID PRIMARY KEY REFERENCES employees(id) ON DELETE CASCADE,
+  name VARCHAR(255) NOT NULL,
+  email VARCHAR(255) NOT NULL,
+  role VARCHAR(100) NOT NULL,
+  department VARCHAR(100),
+  status VARCHAR(50),
+  start_date DATE,
+  overall_progress INTEGER DEFAULT 0,
+  total_tasks INTEGER DEFAULT 0,
+  completed_tasks INTEGER DEFAULT 0,
+  pending_high_priority_tasks INTEGER DEFAULT 0,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Агрегати Q&A аналітики по годинах та днях (оновлюються rollup_qa_interactions)
+CREATE TABLE qa_analytics_rollups (
+  granularity VARCHAR(10) NOT NULL CHECK (granularity IN ('hour', 'day')),
+  bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+  role VARCHAR(100) NOT NULL,
+  questions INTEGER DEFAULT 0,
+  cache_hits INTEGER DEFAULT 0,
+  vector_answers INTEGER DEFAULT 0,
+  fallback_answers INTEGER DEFAULT 0,
+  low_confidence INTEGER DEFAULT 0,
+  confidence_sum FLOAT DEFAULT 0,
+  latency_sum_ms BIGINT DEFAULT 0,
+  latency_max_ms INTEGER DEFAULT 0,
+  -- Гістограма затримок: <=50, 100, 250, 500, 1000, 2500, 5000, 10000, >10000 мс
+  latency_buckets INTEGER[] DEFAULT '{0,0,0,0,0,0,0,0,0}',
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  PRIMARY KEY (granularity, bucket_start, role)
+);
+
+-- Частота питань по днях (для топ питань та питань з низькою впевненістю)
+CREATE TABLE qa_question_rollups (
+  bucket_date DATE NOT NULL,
+  role VARCHAR(100) NOT NULL,
+  question_hash VARCHAR(32) NOT NULL,
+  question TEXT NOT NULL,
+  asks INTEGER DEFAULT 0,
+  low_confidence INTEGER DEFAULT 0,
+  confidence_sum FLOAT DEFAULT 0,
+  PRIMARY KEY (bucket_date, role, question_hash)
+);
+
+-- Водяні знаки інкрементальних агрегацій
+CREATE TABLE rollup_watermarks (
+  name VARCHAR(100) PRIMARY KEY,
+  last_seq BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Таблиця метрик та аналітики
 CREATE TABLE onboarding_metrics (
   id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
@@ -114,6 +180,7 @@ CREATE TABLE onboarding_metrics (
 );
 
 -- Створення індексів для оптимізації
+CREATE UNIQUE INDEX idx_employees_email_normalized ON employees(email_normalized);
 CREATE INDEX idx_employees_role ON employees(role);
 CREATE INDEX idx_employees_status ON employees(status);
 CREATE INDEX idx_employees_start_date ON employees(start_date);
@@ -123,9 +190,75 @@ CREATE INDEX idx_onboarding_progress_employee_id ON onboarding_progress(employee
 CREATE INDEX idx_knowledge_base_role ON knowledge_base(role_specific);
 CREATE INDEX idx_knowledge_base_tags ON knowledge_base USING GIN(tags);
 CREATE INDEX idx_qa_interactions_employee_id ON qa_interactions(employee_id);
+CREATE INDEX idx_qa_interactions_created_at ON qa_interactions(created_at DESC);
+CREATE UNIQUE INDEX idx_qa_interactions_seq ON qa_interactions(seq);
+CREATE INDEX idx_qa_question_rollups_asks ON qa_question_rollups(bucket_date, asks DESC);
 CREATE INDEX idx_mentors_active ON mentors(is_active);
 CREATE INDEX idx_integrations_service ON integrations(service_name);
 CREATE INDEX idx_integrations_active ON integrations(is_active);
+-- Keyset пагінація дашборду (created_at DESC, employee_id DESC) з фільтрами
+CREATE INDEX idx_onboarding_summary_created ON onboarding_summary(created_at DESC, employee_id DESC);
+CREATE INDEX idx_onboarding_summary_department ON onboarding_summary(department, created_at DESC, employee_id DESC);
+CREATE INDEX idx_onboarding_summary_role ON onboarding_summary(role, created_at DESC, employee_id DESC);
+CREATE INDEX idx_onboarding_summary_status ON onboarding_summary(status, created_at DESC, employee_id DESC);
+
+-- Індекси для таблиць DocuMinds (organizations/integrations/resources живуть у базі DocuMinds,
+-- тому створюються лише якщо відповідні таблиці та колонки існують)
+DO $$
+BEGIN
+  IF to_regclass('public.resources') IS NOT NULL THEN
+    -- Покриває фільтр ресурсів інтеграції: organization_id + integration_id + status
+    CREATE INDEX IF NOT EXISTS idx_resources_org_integration_status ON resources(organization_id, integration_id, status);
+    -- Keyset пагінація по id та валідатор ETag по останньому last_synced_at
+    CREATE INDEX IF NOT EXISTS idx_resources_org_integration_status_id ON resources(organization_id, integration_id, status, id);
+    CREATE INDEX IF NOT EXISTS idx_resources_org_status_synced ON resources(organization_id, status, last_synced_at DESC);
+  END IF;
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'integrations' AND column_name = 'organization_id'
+  ) THEN
+    CREATE INDEX IF NOT EXISTS idx_integrations_org_type ON integrations(organization_id, type);
+  END IF;
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'organizations' AND column_name = 'domain'
+  ) THEN
+    CREATE INDEX IF NOT EXISTS idx_organizations_domain ON organizations(domain);
+  END IF;
+END $$;
+
+-- Журнал змін організацій DocuMinds для інвалідації кешу по домену в OnboardAI API
+-- (організації змінюються поза API; воркер читає журнал з інтервалом ORG_CACHE_SYNC_INTERVAL)
+CREATE TABLE IF NOT EXISTS organization_changes (
+    id BIGSERIAL PRIMARY KEY,
+    domain TEXT,
+    changed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION log_organization_change()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP <> 'INSERT' THEN
+    INSERT INTO organization_changes (domain) VALUES (OLD.domain);
+  END IF;
+  IF TG_OP <> 'DELETE' AND (TG_OP = 'INSERT' OR NEW.domain IS DISTINCT FROM OLD.domain) THEN
+    INSERT INTO organization_changes (domain) VALUES (NEW.domain);
+  END IF;
+  RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'organizations' AND column_name = 'domain'
+  ) THEN
+    DROP TRIGGER IF EXISTS log_organizations_change ON organizations;
+    CREATE TRIGGER log_organizations_change AFTER INSERT OR UPDATE OR DELETE ON organizations
+      FOR EACH ROW EXECUTE FUNCTION log_organization_change();
+  END IF;
+END $$;
 
 -- Функція для автоматичного оновлення updated_at
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -143,27 +276,305 @@ CREATE TRIGGER update_onboarding_progress_updated_at BEFORE UPDATE ON onboarding
 CREATE TRIGGER update_knowledge_base_updated_at BEFORE UPDATE ON knowledge_base FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_integrations_updated_at BEFORE UPDATE ON integrations FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
--- Функція для розрахунку загального прогрес співробітника
+-- Інкрементальний агрегат прогресу співробітника:
+-- лічильники tasks_total/tasks_completed змінюються лише при вставці, видаленні
+-- та переходах статусу, тому оновлення коштує O(1) незалежно від кількості завдань.
+-- overall_progress = tasks_completed * 100 / tasks_total
 CREATE OR REPLACE FUNCTION calculate_overall_progress()
 RETURNS TRIGGER AS $$
+DECLARE
+  v_employee_id UUID;
+  v_total_delta INTEGER := 0;
+  v_completed_delta INTEGER := 0;
 BEGIN
-  UPDATE employees 
-  SET overall_progress = (
-    SELECT COALESCE(AVG(progress_percentage), 0)
-    FROM onboarding_progress 
-    WHERE employee_id = NEW.employee_id
-  )
-  WHERE id = NEW.employee_id;
+  IF TG_OP = 'INSERT' THEN
+    v_employee_id := NEW.employee_id;
+    v_total_delta := 1;
+    v_completed_delta := CASE WHEN NEW.status = 'completed' THEN 1 ELSE 0 END;
+  ELSIF TG_OP = 'DELETE' THEN
+    v_employee_id := OLD.employee_id;
+    v_total_delta := -1;
+    v_completed_delta := CASE WHEN OLD.status = 'completed' THEN -1 ELSE 0 END;
+  ELSE
+    v_employee_id := NEW.employee_id;
+    v_completed_delta := (CASE WHEN NEW.status = 'completed' THEN 1 ELSE 0 END)
+                       - (CASE WHEN OLD.status = 'completed' THEN 1 ELSE 0 END);
+    IF v_completed_delta = 0 THEN
+      RETURN NEW;
+    END IF;
+  END IF;
   
-  RETURN NEW;
+  UPDATE employees
+  SET tasks_total = tasks_total + v_total_delta,
+      tasks_completed = tasks_completed + v_completed_delta,
+      overall_progress = CASE
+        WHEN tasks_total + v_total_delta > 0
+        THEN ((tasks_completed + v_completed_delta) * 100) / (tasks_total + v_total_delta)
+        ELSE 0
+      END
+  WHERE id = v_employee_id;
+  
+  RETURN COALESCE(NEW, OLD);
 END;
 $$ language 'plpgsql';
 
--- Тригер для автоматичного розрахунку прогрес
+-- Тригер для інкрементального оновлення прогресу
 CREATE TRIGGER calculate_progress_trigger 
-AFTER INSERT OR UPDATE ON onboarding_progress 
+AFTER INSERT OR DELETE OR UPDATE OF status ON onboarding_progress 
 FOR EACH ROW EXECUTE FUNCTION calculate_overall_progress();
 
+-- Перевірка узгодженості агрегату: перераховує лічильники з onboarding_progress
+-- та виправляє лише розбіжні записи. Повертає кількість виправлених співробітників.
+CREATE OR REPLACE FUNCTION reconcile_onboarding_progress()
+RETURNS INTEGER AS $$
+DECLARE
+  v_fixed INTEGER;
+BEGIN
+  WITH actual AS (
+    SELECT
+      e.id,
+      COUNT(op.id) AS total,
+      COUNT(op.id) FILTER (WHERE op.status = 'completed') AS completed
+    FROM employees e
+    LEFT JOIN onboarding_progress op ON op.employee_id = e.id
+    GROUP BY e.id
+  )
+  UPDATE employees e
+  SET tasks_total = a.total,
+      tasks_completed = a.completed,
+      overall_progress = CASE WHEN a.total > 0 THEN (a.completed * 100) / a.total ELSE 0 END
+  FROM actual a
+  WHERE e.id = a.id
+    AND (e.tasks_total <> a.total OR e.tasks_completed <> a.completed);
+  
+  GET DIAGNOSTICS v_fixed = ROW_COUNT;
+  RETURN v_fixed;
+END;
+$$ language 'plpgsql';
+
+-- Синхронізація зведення з даними співробітника
+CREATE OR REPLACE FUNCTION sync_onboarding_summary_employee()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO onboarding_summary (employee_id, name, email, role, department, status, start_date, overall_progress, created_at)
+    VALUES (NEW.id, NEW.name, NEW.email, NEW.role, NEW.department, NEW.status, NEW.start_date, NEW.overall_progress, NEW.created_at)
+    ON CONFLICT (employee_id) DO NOTHING;
+  ELSIF (NEW.name, NEW.email, NEW.role, NEW.department, NEW.status, NEW.start_date, NEW.overall_progress)
+        IS DISTINCT FROM
+        (OLD.name, OLD.email, OLD.role, OLD.department, OLD.status, OLD.start_date, OLD.overall_progress) THEN
+    UPDATE onboarding_summary
+    SET name = NEW.name,
+        email = NEW.email,
+        role = NEW.role,
+        department = NEW.department,
+        status = NEW.status,
+        start_date = NEW.start_date,
+        overall_progress = NEW.overall_progress,
+        updated_at = NOW()
+    WHERE employee_id = NEW.id;
+  END IF;
+  RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER sync_onboarding_summary_employee_trigger
+AFTER INSERT OR UPDATE ON employees
+FOR EACH ROW EXECUTE FUNCTION sync_onboarding_summary_employee();
+
+-- Інкрементальне оновлення лічильників завдань у зведенні (різниця внесків OLD та NEW)
+CREATE OR REPLACE FUNCTION sync_onboarding_summary_tasks()
+RETURNS TRIGGER AS $$
+DECLARE
+  v_old_total INTEGER := 0;
+  v_old_completed INTEGER := 0;
+  v_old_high INTEGER := 0;
+  v_new_total INTEGER := 0;
+  v_new_completed INTEGER := 0;
+  v_new_high INTEGER := 0;
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    v_old_total := 1;
+    v_old_completed := CASE WHEN OLD.status = 'completed' THEN 1 ELSE 0 END;
+    v_old_high := CASE WHEN OLD.priority = 'high' AND OLD.status != 'completed' THEN 1 ELSE 0 END;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    v_new_total := 1;
+    v_new_completed := CASE WHEN NEW.status = 'completed' THEN 1 ELSE 0 END;
+    v_new_high := CASE WHEN NEW.priority = 'high' AND NEW.status != 'completed' THEN 1 ELSE 0 END;
+  END IF;
+  
+  IF TG_OP = 'UPDATE' AND OLD.employee_id IS DISTINCT FROM NEW.employee_id THEN
+    -- Завдання перепризначене: віднімаємо у старого та додаємо новому
+    UPDATE onboarding_summary
+    SET total_tasks = total_tasks - v_old_total,
+        completed_tasks = completed_tasks - v_old_completed,
+        pending_high_priority_tasks = pending_high_priority_tasks - v_old_high,
+        updated_at = NOW()
+    WHERE employee_id = OLD.employee_id;
+    v_old_total := 0;
+    v_old_completed := 0;
+    v_old_high := 0;
+  END IF;
+  
+  IF (v_new_total - v_old_total, v_new_completed - v_old_completed, v_new_high - v_old_high) <> (0, 0, 0) THEN
+    UPDATE onboarding_summary
+    SET total_tasks = total_tasks + v_new_total - v_old_total,
+        completed_tasks = completed_tasks + v_new_completed - v_old_completed,
+        pending_high_priority_tasks = pending_high_priority_tasks + v_new_high - v_old_high,
+        updated_at = NOW()
+    WHERE employee_id = COALESCE(NEW.employee_id, OLD.employee_id);
+  END IF;
+  
+  RETURN COALESCE(NEW, OLD);
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER sync_onboarding_summary_tasks_trigger
+AFTER INSERT OR DELETE OR UPDATE OF status, priority, employee_id ON onboarding_tasks
+FOR EACH ROW EXECUTE FUNCTION sync_onboarding_summary_tasks();
+
+-- Поелементна сума масивів (гістограми затримок у qa_analytics_rollups)
+CREATE OR REPLACE FUNCTION qa_array_add(a INTEGER[], b INTEGER[])
+RETURNS INTEGER[] AS $$
+  SELECT ARRAY(
+    SELECT COALESCE(x, 0) + COALESCE(y, 0)
+    FROM unnest(a, b) WITH ORDINALITY AS t(x, y, n)
+    ORDER BY n
+  );
+$$ language 'sql' IMMUTABLE;
+
+-- Інкрементальна агрегація qa_interactions з останнього водяного знаку.
+-- Обробляє до p_batch_size записів, старших за p_lag (щоб транзакції з меншим seq встигли закомітитись),
+-- і повертає кількість оброблених записів. Паралельні виклики серіалізуються блокуванням водяного знаку.
+CREATE OR REPLACE FUNCTION rollup_qa_interactions(
+  p_batch_size INTEGER DEFAULT 5000,
+  p_low_confidence FLOAT DEFAULT 0.5,
+  p_lag INTERVAL DEFAULT '30 seconds'
+)
+RETURNS INTEGER AS $$
+DECLARE
+  v_from BIGINT;
+  v_to BIGINT;
+  v_count INTEGER;
+BEGIN
+  INSERT INTO rollup_watermarks (name) VALUES ('qa_interactions') ON CONFLICT (name) DO NOTHING;
+  SELECT last_seq INTO v_from FROM rollup_watermarks WHERE name = 'qa_interactions' FOR UPDATE;
+
+  CREATE TEMP TABLE qa_rollup_batch ON COMMIT DROP AS
+  SELECT
+    seq,
+    created_at,
+    COALESCE(role, 'general') AS role,
+    question,
+    COALESCE(confidence, 0) AS confidence,
+    answer_source,
+    COALESCE(latency_ms, 0) AS latency_ms,
+    width_bucket(COALESCE(latency_ms, 0), ARRAY[51, 101, 251, 501, 1001, 2501, 5001, 10001]) AS latency_bucket
+  FROM qa_interactions
+  WHERE seq > v_from
+    AND ingested_at < NOW() - p_lag
+  ORDER BY seq
+  LIMIT p_batch_size;
+
+  SELECT COUNT(*), MAX(seq) INTO v_count, v_to FROM qa_rollup_batch;
+  IF v_count = 0 THEN
+    DROP TABLE qa_rollup_batch;
+    RETURN 0;
+  END IF;
+
+  INSERT INTO qa_analytics_rollups AS r (
+    granularity, bucket_start, role, questions, cache_hits, vector_answers, fallback_answers,
+    low_confidence, confidence_sum, latency_sum_ms, latency_max_ms, latency_buckets
+  )
+  SELECT
+    g.granularity,
+    date_trunc(g.granularity, b.created_at, 'UTC'),
+    b.role,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE b.answer_source = 'cache'),
+    COUNT(*) FILTER (WHERE b.answer_source = 'vector'),
+    COUNT(*) FILTER (WHERE b.answer_source = 'knowledge_base'),
+    COUNT(*) FILTER (WHERE b.confidence < p_low_confidence),
+    SUM(b.confidence),
+    SUM(b.latency_ms),
+    MAX(b.latency_ms),
+    ARRAY[
+      COUNT(*) FILTER (WHERE b.latency_bucket = 0),
+      COUNT(*) FILTER (WHERE b.latency_bucket = 1),
+      COUNT(*) FILTER (WHERE b.latency_bucket = 2),
+      COUNT(*) FILTER (WHERE b.latency_bucket = 3),
+      COUNT(*) FILTER (WHERE b.latency_bucket = 4),
+      COUNT(*) FILTER (WHERE b.latency_bucket = 5),
+      COUNT(*) FILTER (WHERE b.latency_bucket = 6),
+      COUNT(*) FILTER (WHERE b.latency_bucket = 7),
+      COUNT(*) FILTER (WHERE b.latency_bucket = 8)
+    ]::INTEGER[]
+  FROM qa_rollup_batch b
+  CROSS JOIN (VALUES ('hour'), ('day')) AS g(granularity)
+  GROUP BY 1, 2, 3
+  ON CONFLICT (granularity, bucket_start, role) DO UPDATE
+  SET questions = r.questions + EXCLUDED.questions,
+      cache_hits = r.cache_hits + EXCLUDED.cache_hits,
+      vector_answers = r.vector_answers + EXCLUDED.vector_answers,
+      fallback_answers = r.fallback_answers + EXCLUDED.fallback_answers,
+      low_confidence = r.low_confidence + EXCLUDED.low_confidence,
+      confidence_sum = r.confidence_sum + EXCLUDED.confidence_sum,
+      latency_sum_ms = r.latency_sum_ms + EXCLUDED.latency_sum_ms,
+      latency_max_ms = GREATEST(r.latency_max_ms, EXCLUDED.latency_max_ms),
+      latency_buckets = qa_array_add(r.latency_buckets, EXCLUDED.latency_buckets),
+      updated_at = NOW();
+
+  -- Нормалізація питання збігається з normalize_question в cache_warmup.py
+  INSERT INTO qa_question_rollups AS q (bucket_date, role, question_hash, question, asks, low_confidence, confidence_sum)
+  SELECT
+    (n.created_at AT TIME ZONE 'UTC')::DATE,
+    n.role,
+    md5(n.normalized),
+    MIN(n.question),
+    COUNT(*),
+    COUNT(*) FILTER (WHERE n.confidence < p_low_confidence),
+    SUM(n.confidence)
+  FROM (
+    SELECT b.*, rtrim(regexp_replace(lower(btrim(b.question)), '\s+', ' ', 'g'), '?!. ') AS normalized
+    FROM qa_rollup_batch b
+  ) n
+  GROUP BY 1, 2, 3
+  ON CONFLICT (bucket_date, role, question_hash) DO UPDATE
+  SET asks = q.asks + EXCLUDED.asks,
+      low_confidence = q.low_confidence + EXCLUDED.low_confidence,
+      confidence_sum = q.confidence_sum + EXCLUDED.confidence_sum;
+
+  UPDATE rollup_watermarks SET last_seq = v_to, updated_at = NOW() WHERE name = 'qa_interactions';
+  DROP TABLE qa_rollup_batch;
+  RETURN v_count;
+END;
+$$ language 'plpgsql';
+
+-- Топ питань за період з денних агрегатів (O(агрегати), а не O(взаємодії))
+CREATE OR REPLACE FUNCTION qa_top_questions(
+  p_from DATE,
+  p_to DATE,
+  p_role VARCHAR DEFAULT NULL,
+  p_limit INTEGER DEFAULT 20,
+  p_low_confidence_only BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE (role VARCHAR, question TEXT, asks BIGINT, low_confidence BIGINT, avg_confidence FLOAT) AS $$
+  SELECT
+    q.role,
+    MIN(q.question),
+    SUM(q.asks),
+    SUM(q.low_confidence),
+    SUM(q.confidence_sum) / NULLIF(SUM(q.asks), 0)
+  FROM qa_question_rollups q
+  WHERE q.bucket_date BETWEEN p_from AND p_to
+    AND (p_role IS NULL OR q.role = p_role)
+  GROUP BY q.role, q.question_hash
+  HAVING NOT p_low_confidence_only OR SUM(q.low_confidence) > 0
+  ORDER BY CASE WHEN p_low_confidence_only THEN SUM(q.low_confidence) ELSE SUM(q.asks) END DESC
+  LIMIT p_limit;
+$$ language 'sql' STABLE;
+
 -- Вставка прикладух даних для демонстрації
 INSERT INTO employees (name, email, role, department, start_date, manager_email, skills_required, resources_needed) VALUES
 ('Іван Петренко', 'ivan.petrenko@company.com', 'Frontend Developer', 'Engineering', '2024-01-15', 'manager@company.com', '{"React", "TypeScript", "CSS"}', '{"Laptop", "Monitor", "IDE License"}'),
@@ -234,8 +645,25 @@ FROM employees e
 LEFT JOIN onboarding_tasks ot ON e.id = ot.employee_id
 GROUP BY e.id, e.name, e.email, e.role, e.department, e.status, e.overall_progress;
 
+-- Початкове заповнення зведення для існуючих даних (тригери підтримують його далі)
+INSERT INTO onboarding_summary (
+  employee_id, name, email, role, department, status, start_date, overall_progress,
+  total_tasks, completed_tasks, pending_high_priority_tasks, created_at
+)
+SELECT
+  s.id, s.name, s.email, s.role, s.department, s.status, e.start_date, s.overall_progress,
+  s.total_tasks, s.completed_tasks, s.pending_high_priority_tasks, e.created_at
+FROM employee_onboarding_summary s
+JOIN employees e ON e.id = s.id
+ON CONFLICT (employee_id) DO UPDATE
+SET total_tasks = EXCLUDED.total_tasks,
+    completed_tasks = EXCLUDED.completed_tasks,
+    pending_high_priority_tasks = EXCLUDED.pending_high_priority_tasks;
+
 COMMENT ON TABLE employees IS 'Основна таблиця співробітників для процесу онбордингу';
 COMMENT ON TABLE onboarding_tasks IS 'Завдання онбордингу з розподіленням по співробітниках';
 COMMENT ON TABLE onboarding_progress IS 'Прогрес виконання завдань онбордингу';
 COMMENT ON TABLE knowledge_base IS 'База знань з документацією та відповідями';
+COMMENT ON TABLE onboarding_summary IS 'Інкрементально оновлюване зведення онбордингу для HR дашборду';
 COMMENT ON TABLE qa_interactions IS 'Історія питань та відповідей для покращення системи';
+COMMENT ON TABLE qa_analytics_rollups IS 'Погодинні та денні агрегати Q&A для аналітики (інкрементально з водяного знаку)';
@@ -15,6 +15,21 @@ const PORT = process.env.PORT || 3001;
 app.use(cors());
 app.use(express.json());
 
+// W3C Trace Context: продовжуємо трейс OnboardAI API (заголовок traceparent)
+app.use((req, res, next) => {
+  const traceparent = req.get('traceparent');
+  if (traceparent) {
+    const [, traceId, parentSpanId] = traceparent.split('-');
+    req.traceContext = { traceparent, traceId, parentSpanId };
+    res.set('traceparent', traceparent);
+    const startedAt = Date.now();
+    res.on('finish', () => {
+      console.log(`🧵 trace=${traceId} parent=${parentSpanId} ${req.method} ${req.path} ${res.statusCode} ${Date.now() - startedAt}ms`);
+    });
+  }
+  next();
+});
+
 // Конфігурація Jira
 const JIRA_CONFIG = {
   url: process.env.JIRA_URL,
@@ -24,6 +39,9 @@ const JIRA_CONFIG = {
   projectKey: 'ONBD'  // Ключ проекту для онбордингу
 };
 
+// Час старту сервера - маркер змін для мок даних
+const SERVER_STARTED_AT = new Date().toISOString();
+
 // Функції для роботи з Jira API
 class JiraClient {
   constructor(config) {
@@ -97,12 +115,32 @@ class JiraClient {
   }
 
   async getProjectIssues(projectKey) {
+    const { issues } = await this.searchIssues(projectKey);
+    return issues;
+  }
+
+  // Сторінка задач проекту в порядку оновлення (updatedSince - маркер змін для інкрементальної синхронізації)
+  async searchIssues(projectKey, { startAt = 0, maxResults = 50, updatedSince = null } = {}) {
     await this.authenticate();
-    
+
+    let jql = `project=${projectKey}`;
+    if (updatedSince) {
+      // JQL приймає дату з точністю до хвилини; повтори на межі відсіює клієнт
+      const since = new Date(updatedSince).toISOString().slice(0, 16).replace('T', ' ').replace(/-/g, '/');
+      jql += ` AND updated >= "${since}"`;
+    }
+    jql += ' ORDER BY updated ASC';
+
     try {
       const response = await axios.get(
-        `${this.config.url}/rest/api/3/search?jql=project=${projectKey}`,
+        `${this.config.url}/rest/api/3/search`,
         {
+          params: {
+            jql,
+            startAt,
+            maxResults,
+            fields: 'summary,description,status,issuetype,assignee,updated'
+          },
           headers: {
             'Authorization': `Bearer ${this.accessToken}`,
             'Content-Type': 'application/json'
@@ -110,21 +148,24 @@ class JiraClient {
         }
       );
 
-      return response.data.issues || [];
+      const issues = response.data.issues || [];
+      return { issues, total: response.data.total ?? issues.length };
     } catch (error) {
       console.error('Помилка отримання задач з Jira:', error.message);
       // Мок дані для демо
-      return [
+      const issues = startAt > 0 ? [] : [
         {
           id: 'MOCK-101',
           key: 'ONBD-101',
           fields: {
             summary: 'Перше завдання онбордингу',
             status: { name: 'To Do' },
-            assignee: { displayName: 'New Employee' }
+            assignee: { displayName: 'New Employee' },
+            updated: SERVER_STARTED_AT
           }
         }
       ];
+      return { issues, total: 1 };
     }
   }
 
@@ -295,14 +336,23 @@ app.post('/api/jira/onboarding/tasks', async (req, res) => {
 // Отримання задач проекту
 app.get('/api/jira/projects', async (req, res) => {
   try {
-    const { projectKey } = req.query;
-    
-    const issues = await jiraClient.getProjectIssues(projectKey || JIRA_CONFIG.projectKey);
+    const { projectKey, updatedSince } = req.query;
+    const startAt = parseInt(req.query.startAt, 10) || 0;
+    const maxResults = Math.min(parseInt(req.query.maxResults, 10) || 50, 100);
+
+    const { issues, total } = await jiraClient.searchIssues(projectKey || JIRA_CONFIG.projectKey, {
+      startAt,
+      maxResults,
+      updatedSince
+    });
 
     res.json({
       success: true,
       project_key: projectKey || JIRA_CONFIG.projectKey,
       issues_count: issues.length,
+      start_at: startAt,
+      max_results: maxResults,
+      total,
       issues
     });
 
@@ -390,6 +440,59 @@ app.post('/api/jira/sync', async (req, res) => {
   }
 });
 
+// Пакетна синхронізація з outbox OnboardAI (ідемпотентна по idempotency_key)
+const processedSyncKeys = new Map();
+const SYNC_KEY_TTL_MS = 24 * 60 * 60 * 1000;
+const SYNC_BATCH_CONCURRENCY = parseInt(process.env.SYNC_BATCH_CONCURRENCY || '5', 10);
+
+app.post('/api/jira/sync/batch', async (req, res) => {
+  const items = Array.isArray(req.body.items) ? req.body.items : [];
+  console.log(`🔄 Пакетна синхронізація з Jira: ${items.length} співробітників`);
+
+  // Очищення застарілих ключів ідемпотентності
+  const now = Date.now();
+  for (const [key, processedAt] of processedSyncKeys) {
+    if (now - processedAt > SYNC_KEY_TTL_MS) processedSyncKeys.delete(key);
+  }
+
+  const results = new Array(items.length);
+  let next = 0;
+
+  const worker = async () => {
+    while (next < items.length) {
+      const index = next++;
+      const { idempotency_key, employee_id, role, action } = items[index];
+
+      if (processedSyncKeys.has(idempotency_key)) {
+        results[index] = { idempotency_key, employee_id, success: true, duplicate: true };
+        continue;
+      }
+
+      try {
+        const tasks = await jiraClient.createOnboardingTasks({
+          employee_id,
+          name: `Employee-${employee_id}`,
+          email: 'new@company.com',
+          role,
+          department: 'General'
+        });
+        processedSyncKeys.set(idempotency_key, Date.now());
+        results[index] = { idempotency_key, employee_id, action, success: true, tasks_created: tasks.length };
+      } catch (error) {
+        results[index] = { idempotency_key, employee_id, action, success: false, error: error.message };
+      }
+    }
+  };
+
+  await Promise.all(Array.from({ length: Math.min(SYNC_BATCH_CONCURRENCY, items.length) }, worker));
+
+  res.json({
+    success: results.every(result => result.success),
+    synced: results.filter(result => result.success).length,
+    results
+  });
+});
+
 // Обробка помилок
 app.use((error, req, res, next) => {
   console.error('❌ Global error handler:', error);
@@ -15,6 +15,21 @@ const PORT = process.env.PORT || 3022;
 app.use(cors());
 app.use(express.json());
 
+// W3C Trace Context: продовжуємо трейс OnboardAI API (заголовок traceparent)
+app.use((req, res, next) => {
+  const traceparent = req.get('traceparent');
+  if (traceparent) {
+    const [, traceId, parentSpanId] = traceparent.split('-');
+    req.traceContext = { traceparent, traceId, parentSpanId };
+    res.set('traceparent', traceparent);
+    const startedAt = Date.now();
+    res.on('finish', () => {
+      console.log(`🧵 trace=${traceId} parent=${parentSpanId} ${req.method} ${req.path} ${res.statusCode} ${Date.now() - startedAt}ms`);
+    });
+  }
+  next();
+});
+
 // Конфігурація Notion
 const NOTION_CONFIG = {
   apiKey: process.env.NOTION_API_KEY,
@@ -577,10 +592,47 @@ app.post('/api/onboarding/page', async (req, res) => {
   }
 });
 
+// Час старту сервера - last_edited_time сторінок вбудованої бази знань
+const SERVER_STARTED_AT = new Date().toISOString();
+
+// Сторінки бази знань одним списком зі стабільними id (для конекторів векторизації)
+function knowledgeBasePages(role) {
+  const pages = [];
+  for (const [pageRole, resources] of Object.entries(KNOWLEDGE_BASE)) {
+    if (role && pageRole !== role) continue;
+    for (const resource of resources) {
+      pages.push({
+        id: resource.url.replace(/^https?:\/\//, '').replace(/[^a-zA-Z0-9]+/g, '-'),
+        role: pageRole,
+        ...resource,
+        last_edited_time: resource.last_edited_time || SERVER_STARTED_AT
+      });
+    }
+  }
+  return pages.sort((a, b) => a.last_edited_time.localeCompare(b.last_edited_time) || a.id.localeCompare(b.id));
+}
+
 // Отримання всієї бази знань
 app.get('/api/knowledge-base', async (req, res) => {
   try {
     const { role } = req.query;
+
+    // format=pages: посторінковий список з маркером змін (updated_since) та курсором
+    if (req.query.format === 'pages') {
+      const offset = parseInt(req.query.cursor, 10) || 0;
+      const limit = Math.min(parseInt(req.query.limit, 10) || 50, 100);
+      const updatedSince = req.query.updated_since;
+      const pages = knowledgeBasePages(role)
+        .filter(page => !updatedSince || new Date(page.last_edited_time) >= new Date(updatedSince));
+      const slice = pages.slice(offset, offset + limit);
+
+      return res.json({
+        success: true,
+        role: role || 'all',
+        pages: slice,
+        next_cursor: offset + limit < pages.length ? String(offset + limit) : null
+      });
+    }
     
     let knowledgeBase = KNOWLEDGE_BASE;
     if (role && KNOWLEDGE_BASE[role]) {
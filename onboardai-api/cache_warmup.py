@@ -0,0 +1,131 @@
+"""
+OnboardAI Cache Warm-up - Прогрів кешів відповідей та семантичного пошуку з історії qa_interactions
+"""
+
+import os
+import re
+import time
+import asyncio
+import hashlib
+import logging
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from metrics import observe_supabase
+from resilience import remaining_budget, reset_request_budget, start_request_budget
+
+logger = logging.getLogger(__name__)
+
+# Шаблони запитів по ролі (ті ж, що використовує /api/v1/ai/knowledge-summary)
+ROLE_KNOWLEDGE_QUERIES = [
+    "onboarding process for {role}",
+    "technical stack for {role}",
+    "common tasks for {role}",
+    "team structure for {role}",
+]
+
+
+def normalize_question(question: str) -> str:
+    """Нормалізація питання для ключа кешу та підрахунку частоти"""
+    return re.sub(r"\s+", " ", question.strip().lower()).rstrip("?!. ")
+
+
+def qa_cache_key(question: str, role: str) -> str:
+    """Стабільний між процесами ключ кешу відповіді (hash() рандомізується для кожного процесу)"""
+    digest = hashlib.sha1(f"{role}|{normalize_question(question)}".encode()).hexdigest()
+    return f"qa:{digest}"
+
+
+class CacheWarmer:
+    """Прогрів кешу відповідей для частих питань та семантичного пошуку для шаблонів ролей"""
+
+    def __init__(self, supabase, redis_client):
+        self.supabase = supabase
+        self.redis_client = redis_client
+
+        # Параметри прогріву
+        self.budget_seconds = float(os.getenv("QA_WARMUP_BUDGET_SECONDS", "120"))
+        self.max_questions = int(os.getenv("QA_WARMUP_MAX_QUESTIONS", "200"))
+        self.history_limit = int(os.getenv("QA_WARMUP_HISTORY_LIMIT", "5000"))
+        self.concurrency = int(os.getenv("QA_WARMUP_CONCURRENCY", "4"))
+        self.roles = [
+            role.strip()
+            for role in os.getenv("QA_WARMUP_ROLES", "Frontend Developer,Backend Developer,DevOps Engineer").split(",")
+            if role.strip()
+        ]
+
+    def hot_questions(self) -> List[Tuple[str, str, int]]:
+        """Найчастіші питання з історії: (питання, роль, кількість)"""
+        with observe_supabase("qa_interactions", "select"):
+            result = self.supabase.table("qa_interactions")\
+                .select("question, role, employees(role)")\
+                .order("created_at", desc=True)\
+                .limit(self.history_limit)\
+                .execute()
+
+        counts: Counter = Counter()
+        originals: Dict[Tuple[str, str], str] = {}
+        for row in result.data or []:
+            if not row.get("question"):
+                continue
+            # Роль питання; для записів до появи колонки role - роль співробітника
+            role = row.get("role") or (row.get("employees") or {}).get("role") or "general"
+            key = (normalize_question(row["question"]), role)
+            counts[key] += 1
+            originals.setdefault(key, row["question"])
+
+        return [(originals[key], key[1], count) for key, count in counts.most_common(self.max_questions)]
+
+    async def run(
+        self,
+        answer: Callable[[str, str], Awaitable],
+        search: Callable[[str], Awaitable],
+    ) -> Dict:
+        """
+        Прогрів у межах budget_seconds
+
+        answer(question, role) заповнює кеш відповіді (embedding, пошук та LLM),
+        search(query) - кеш семантичного пошуку для шаблонів ролей.
+        Бюджет встановлюється як бюджет запиту, тож очікування rate limiter-а та виклики залежностей
+        зупиняються разом з ним.
+        """
+        start = time.monotonic()
+        stats = {"questions": 0, "already_cached": 0, "role_queries": 0, "failed": 0, "skipped_budget": 0}
+
+        questions = await asyncio.to_thread(self.hot_questions)
+        roles = list(dict.fromkeys(self.roles + [role for _, role, _ in questions if role != "general"]))
+        role_queries = [template.format(role=role) for role in roles for template in ROLE_KNOWLEDGE_QUERIES]
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        budget_token = start_request_budget(self.budget_seconds)
+
+        async def warm(kind: str, operation: Callable[[], Awaitable]):
+            async with semaphore:
+                budget = remaining_budget()
+                if budget is not None and budget <= 0:
+                    stats["skipped_budget"] += 1
+                    return
+                try:
+                    await operation()
+                    stats[kind] += 1
+                except Exception as e:
+                    stats["failed"] += 1
+                    logger.warning(f"Прогрів кешу: помилка ({kind}): {e}")
+
+        try:
+            jobs = []
+            # Спершу найчастіші питання - вони дають найбільше попадань у кеш
+            for question, role, _ in questions:
+                if self.redis_client.exists(qa_cache_key(question, role)):
+                    stats["already_cached"] += 1
+                    continue
+                jobs.append(warm("questions", lambda q=question, r=role: answer(q, r)))
+            for query in role_queries:
+                jobs.append(warm("role_queries", lambda q=query: search(q)))
+            await asyncio.gather(*jobs)
+        finally:
+            reset_request_budget(budget_token)
+
+        stats["seconds"] = round(time.monotonic() - start, 3)
+        logger.info(f"Прогрів кешу завершено: {stats}")
+        return stats
@@ -0,0 +1,358 @@
+"""
+OnboardAI Connectors - Інкрементальна векторизація вмісту Notion та Jira через MCP сервери
+
+Кожен конектор посторінково читає своє джерело після збереженого маркера змін
+(last_edited_time / updated), з власним лімітом запитів на секунду. Джерела синхронізуються
+паралельно; наступна сторінка читається, поки попередня векторизується. Документи без змін
+вмісту (відбиток sha1) пропускаються, тож вартість синхронізації пропорційна змінам.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+from resilience import breakers, reset_request_budget, start_request_budget
+from vector_service import SEARCH_GENERATION_KEY
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = "connector_sync:markers"
+FINGERPRINTS_PREFIX = "connector_sync:fingerprints:"
+LAST_RUN_KEY = "connector_sync:last_run"
+
+
+def parse_marker(value: Optional[str]) -> Optional[datetime]:
+    """Маркер змін джерела (ISO 8601, зокрема Jira '2024-01-15T10:30:00.000+0000') у UTC"""
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%dT%H:%M:%S.%f%z", "%Y-%m-%dT%H:%M:%S%z"):
+        try:
+            return datetime.strptime(value, fmt).astimezone(timezone.utc)
+        except ValueError:
+            continue
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed.astimezone(timezone.utc) if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class _RequestRate:
+    """Мінімальний інтервал між запитами конектора (ліміт запитів на секунду до MCP сервера)"""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            delay = self._next - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next = max(time.monotonic(), self._next) + self.interval
+
+
+class Connector:
+    """
+    Базовий конектор MCP джерела
+
+    pages(since) повертає сторінки документів {id, title, content, url, marker, metadata};
+    id документа стабільний і з префіксом джерела, marker - ISO час зміни в джерелі.
+    """
+
+    source = ""
+    breaker = ""
+
+    def __init__(self, client_factory: Callable[[], httpx.AsyncClient], requests_per_second: float, page_size: int):
+        self._client_factory = client_factory
+        self._rate = _RequestRate(requests_per_second)
+        self.page_size = page_size
+
+    async def _get(self, path: str, params: Dict) -> Dict:
+        await self._rate.wait()
+
+        async def request():
+            response = await self._client_factory().get(path, params={k: v for k, v in params.items() if v is not None})
+            response.raise_for_status()
+            return response.json()
+
+        return await breakers[self.breaker].call(request)
+
+    def pages(self, since: Optional[str]) -> AsyncIterator[List[Dict]]:
+        raise NotImplementedError
+
+
+class NotionConnector(Connector):
+    """Сторінки бази знань mcp-notion (/api/knowledge-base?format=pages) за last_edited_time"""
+
+    source = "notion"
+    breaker = "mcp_notion"
+
+    async def pages(self, since: Optional[str]) -> AsyncIterator[List[Dict]]:
+        cursor = None
+        while True:
+            data = await self._get("/api/knowledge-base", {
+                "format": "pages",
+                "cursor": cursor,
+                "limit": self.page_size,
+                "updated_since": since,
+            })
+            yield [
+                {
+                    "id": f"notion:{page['id']}",
+                    "title": page.get("title", ""),
+                    "content": page.get("content", ""),
+                    "url": page.get("url", ""),
+                    "marker": page.get("last_edited_time"),
+                    "metadata": {"role": page.get("role", ""), "tags": page.get("tags", [])},
+                }
+                for page in data.get("pages", [])
+            ]
+            cursor = data.get("next_cursor")
+            if not cursor:
+                return
+
+
+class JiraConnector(Connector):
+    """Задачі проектів mcp-jira (/api/jira/projects) у порядку поля updated"""
+
+    source = "jira"
+    breaker = "mcp_jira"
+
+    def __init__(self, client_factory, requests_per_second: float, page_size: int, projects: List[str]):
+        super().__init__(client_factory, requests_per_second, page_size)
+        self.projects = projects
+
+    async def pages(self, since: Optional[str]) -> AsyncIterator[List[Dict]]:
+        for project in self.projects:
+            start_at = 0
+            while True:
+                data = await self._get("/api/jira/projects", {
+                    "projectKey": project,
+                    "startAt": start_at,
+                    "maxResults": self.page_size,
+                    "updatedSince": since,
+                })
+                issues = data.get("issues", [])
+                yield [self._document(project, issue) for issue in issues]
+                start_at += len(issues)
+                if not issues or start_at >= data.get("total", 0):
+                    break
+
+    @staticmethod
+    def _document(project: str, issue: Dict) -> Dict:
+        fields = issue.get("fields") or {}
+        status = (fields.get("status") or {}).get("name", "")
+        lines = [
+            f"Задача Jira {issue.get('key')}: {fields.get('summary', '')}",
+            f"Проект: {project}",
+            f"Статус: {status}",
+        ]
+        description = _adf_text(fields.get("description"))
+        if description:
+            lines.append(f"Опис: {description}")
+        return {
+            "id": f"jira:{issue.get('key') or issue.get('id')}",
+            "title": fields.get("summary", ""),
+            "content": "\n".join(lines),
+            "url": issue.get("self", ""),
+            "marker": fields.get("updated"),
+            "metadata": {"project": project, "status": status},
+        }
+
+
+def _adf_text(node) -> str:
+    """Текст опису Jira (рядок або Atlassian Document Format)"""
+    if not node:
+        return ""
+    if isinstance(node, str):
+        return node
+    if isinstance(node, dict):
+        if node.get("type") == "text":
+            return node.get("text", "")
+        separator = "\n" if node.get("type") in ("paragraph", "heading", "listItem") else ""
+        return "".join(_adf_text(child) for child in node.get("content", [])) + separator
+    if isinstance(node, list):
+        return "".join(_adf_text(child) for child in node)
+    return ""
+
+
+def build_connectors(get_client: Callable[[str], httpx.AsyncClient]) -> List[Connector]:
+    """Конектори з налаштувань env (CONNECTOR_SOURCES); хости - ті ж, що й для MCP викликів API"""
+    page_size = int(os.getenv("CONNECTOR_PAGE_SIZE", "50"))
+    sources = {source.strip() for source in os.getenv("CONNECTOR_SOURCES", "notion,jira").split(",") if source.strip()}
+    connectors: List[Connector] = []
+    if "notion" in sources:
+        connectors.append(NotionConnector(
+            lambda: get_client("notion"), float(os.getenv("CONNECTOR_NOTION_RPS", "3")), page_size
+        ))
+    if "jira" in sources:
+        projects = [key.strip() for key in os.getenv("CONNECTOR_JIRA_PROJECTS", "ONBD").split(",") if key.strip()]
+        connectors.append(JiraConnector(
+            lambda: get_client("jira"), float(os.getenv("CONNECTOR_JIRA_RPS", "5")), page_size, projects
+        ))
+    return connectors
+
+
+class ConnectorSync:
+    """Синхронізація конекторів з векторним індексом: маркери змін та відбитки документів у Redis"""
+
+    def __init__(self, service, connectors: List[Connector]):
+        self.service = service
+        self.redis_client = service.redis_client
+        self.connectors = connectors
+
+        # Параметри синхронізації
+        self.budget_seconds = float(os.getenv("CONNECTOR_SYNC_BUDGET_SECONDS", "1800"))
+        self.prefetch_pages = int(os.getenv("CONNECTOR_PREFETCH_PAGES", "2"))
+
+    def status(self) -> Dict:
+        markers = {key.decode(): value.decode() for key, value in self.redis_client.hgetall(STATE_KEY).items()}
+        last_run = self.redis_client.get(LAST_RUN_KEY)
+        return {
+            "sources": [connector.source for connector in self.connectors],
+            "markers": markers,
+            "documents": {
+                connector.source: self.redis_client.hlen(f"{FINGERPRINTS_PREFIX}{connector.source}")
+                for connector in self.connectors
+            },
+            "last_run": json.loads(last_run) if last_run else None,
+        }
+
+    async def run(self, full: bool = False) -> Dict:
+        """
+        Синхронізація всіх джерел паралельно (full=True - без маркера, з видаленням зниклих документів)
+
+        Маркер джерела зсувається лише після успішного проходу всіх його сторінок.
+        """
+        budget_token = start_request_budget(self.budget_seconds)
+        start = time.monotonic()
+        try:
+            if not self.service.index:
+                await self.service.initialize_index()
+            results = await asyncio.gather(
+                *(self._sync_source(connector, full) for connector in self.connectors),
+                return_exceptions=True,
+            )
+        finally:
+            reset_request_budget(budget_token)
+
+        report = {"full": full, "sources": {}, "seconds": None}
+        changed = False
+        for connector, result in zip(self.connectors, results):
+            if isinstance(result, Exception):
+                logger.error(f"Синхронізація {connector.source} не вдалася: {result}")
+                report["sources"][connector.source] = {"error": str(result)}
+            else:
+                report["sources"][connector.source] = result
+                changed = changed or bool(result["updated"] or result["deleted"])
+
+        if changed:
+            # Нове покоління індексу - закешовані результати пошуку більше не використовуються
+            self.redis_client.incr(SEARCH_GENERATION_KEY)
+        report["seconds"] = round(time.monotonic() - start, 3)
+        report["completed_at"] = datetime.now(timezone.utc).isoformat()
+        self.redis_client.set(LAST_RUN_KEY, json.dumps(report))
+        return report
+
+    async def _sync_source(self, connector: Connector, full: bool) -> Dict:
+        fingerprints_key = f"{FINGERPRINTS_PREFIX}{connector.source}"
+        since = None if full else self.redis_client.hget(STATE_KEY, connector.source)
+        since = since.decode() if isinstance(since, bytes) else since
+        stats = {"since": since, "seen": 0, "updated": 0, "unchanged": 0, "chunks": 0, "deleted": 0}
+        max_marker = parse_marker(since)
+        seen_ids = set() if full else None
+
+        # Читання сторінок (producer) паралельно з векторизацією (consumer), черга обмежена
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch_pages)
+
+        async def produce():
+            try:
+                async for page in connector.pages(since):
+                    await queue.put(page)
+            finally:
+                await queue.put(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while (page := await queue.get()) is not None:
+                stats["seen"] += len(page)
+                if seen_ids is not None:
+                    seen_ids.update(document["id"] for document in page)
+                for document in page:
+                    marker = parse_marker(document.get("marker"))
+                    if marker and (max_marker is None or marker > max_marker):
+                        max_marker = marker
+                await self._store_page(connector, page, fingerprints_key, stats)
+            await producer
+        finally:
+            producer.cancel()
+
+        if seen_ids is not None:
+            stats["deleted"] = await self._delete_missing(fingerprints_key, seen_ids)
+        if max_marker:
+            self.redis_client.hset(STATE_KEY, connector.source, max_marker.isoformat())
+        logger.info(f"Синхронізація {connector.source}: {stats}")
+        return stats
+
+    async def _store_page(self, connector: Connector, page: List[Dict], fingerprints_key: str, stats: Dict):
+        if not page:
+            return
+        # Повтори на межі маркера та правки без зміни тексту відсіюються за відбитком вмісту
+        fingerprints = {
+            document["id"]: hashlib.sha1(f"{document['title']}\n{document['content']}".encode()).hexdigest()
+            for document in page
+        }
+        stored = self.redis_client.hmget(fingerprints_key, list(fingerprints))
+        changed = [
+            document for document, previous in zip(page, stored)
+            if (previous.decode() if previous else None) != fingerprints[document["id"]]
+        ]
+        stats["unchanged"] += len(page) - len(changed)
+
+        # Chunks усіх змінених документів сторінки - одним викликом (embeddings батчами)
+        chunks: List[Dict] = []
+        counts: Dict[str, int] = {}
+        for document in changed:
+            metadata = {
+                "type": f"{connector.source}_document",
+                "source": connector.source,
+                "document_id": document["id"],
+                "name": document["title"],
+                "url": document["url"],
+                "updated_at": document.get("marker") or "",
+                **{key: value for key, value in document["metadata"].items() if value not in (None, "")},
+            }
+            text = f"{document['title']}\n\n{document['content']}" if document["title"] else document["content"]
+            document_chunks = self.service.chunk_document(text, {})
+            counts[document["id"]] = len(document_chunks)
+            chunks.extend(
+                {"id": f"{document['id']}#{index}", "content": chunk.page_content, "metadata": {**metadata, "chunk_index": index}}
+                for index, chunk in enumerate(document_chunks)
+            )
+        if chunks:
+            await self.service.store_chunks(chunks)
+
+        # Відбиток зберігається лише після запису - невдалий батч повториться на наступній синхронізації
+        for document in changed:
+            await asyncio.to_thread(self.service.delete_stale_chunks, document["id"], counts[document["id"]])
+            self.redis_client.hset(fingerprints_key, document["id"], fingerprints[document["id"]])
+        stats["updated"] += len(changed)
+        stats["chunks"] += len(chunks)
+
+    async def _delete_missing(self, fingerprints_key: str, seen_ids: set) -> int:
+        """Повна синхронізація: видалення документів, яких більше немає в джерелі"""
+        known = {key.decode() for key in self.redis_client.hkeys(fingerprints_key)}
+        missing = known - seen_ids
+        for document_id in missing:
+            await asyncio.to_thread(self.service.delete_stale_chunks, document_id, 0)
+            self.redis_client.hdel(fingerprints_key, document_id)
+        return len(missing)
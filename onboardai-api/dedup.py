@@ -0,0 +1,147 @@
+"""
+OnboardAI Dedup - Пошук майже однакових chunks (MinHash + LSH) перед векторизацією
+"""
+
+import re
+import json
+import hashlib
+import logging
+from typing import Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Простий модуль 2^31 - 1: a * h + b вміщується в uint64 без переповнення
+_PRIME = np.uint64((1 << 31) - 1)
+
+# Ліміт metadata вектора в Pinecone - 40 KB; запас лишається на поля, додані при записі
+DEFAULT_MAX_METADATA_BYTES = 32 * 1024
+
+# Значення, якими шаблонні описи відрізняються між собою, замінюються маркерами
+_URL = re.compile(r"https?://\S+")
+_UUID = re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b")
+_NUMBER = re.compile(r"\d+([.:\-T]\d+)*")
+_TOKEN = re.compile(r"\w+|<\w+>")
+
+
+def normalize_for_sketch(text: str) -> List[str]:
+    """Токени тексту з маскованими URL, ідентифікаторами, датами та числами"""
+    text = _URL.sub(" <url> ", text.lower())
+    text = _UUID.sub(" <id> ", text)
+    text = _NUMBER.sub(" <num> ", text)
+    return _TOKEN.findall(text)
+
+
+class MinHasher:
+    """MinHash сигнатури word-шинглів з LSH розбиттям на смуги"""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 2, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm має ділитися на bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+    def _shingle_hashes(self, tokens: List[str]) -> np.ndarray:
+        size = min(self.shingle_size, len(tokens)) or 1
+        shingles = {" ".join(tokens[i:i + size]) for i in range(max(1, len(tokens) - size + 1))}
+        return np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little") % int(_PRIME) for s in shingles],
+            dtype=np.uint64,
+        )
+
+    def signature(self, text: str) -> np.ndarray:
+        """Мінімуми num_perm хеш-перестановок по всіх шинглах (одна векторна операція)"""
+        hashes = self._shingle_hashes(normalize_for_sketch(text))
+        return ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def band_keys(self, signature: np.ndarray) -> List[bytes]:
+        """Ключі LSH кошиків: номер смуги + значення її рядків"""
+        return [
+            bytes([band]) + signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+
+def _json_size(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False).encode())
+
+
+def deduplicate_chunks(
+    chunks: List[Dict],
+    threshold: float = 0.8,
+    max_sources: int = 32,
+    max_metadata_bytes: int = DEFAULT_MAX_METADATA_BYTES,
+) -> List[Dict]:
+    """
+    Групування майже однакових chunks; повертає по одному представнику на групу
+
+    Представник отримує в metadata source_ids/source_names chunks групи (для розгортання
+    результатів пошуку) та duplicate_count - розмір усієї групи. Списки джерел обрізаються
+    до max_sources і так, щоб серіалізована metadata разом з текстом chunk-а не перевищила
+    max_metadata_bytes; кількість відкинутих джерел - duplicate_count мінус довжина списку.
+    Кандидати знаходяться через LSH смуги, а схожість перевіряється оцінкою Jaccard
+    з сигнатур відносно представника групи.
+    """
+    hasher = MinHasher()
+
+    representatives: List[Dict] = []
+    metadata_sizes: List[int] = []
+    signatures: List[np.ndarray] = []
+    buckets: Dict[bytes, List[int]] = {}
+
+    for chunk in chunks:
+        signature = hasher.signature(chunk["content"])
+        keys = hasher.band_keys(signature)
+
+        match = None
+        candidates = {index for key in keys for index in buckets.get(key, [])}
+        if candidates:
+            ordered = sorted(candidates)
+            similarity = (np.stack([signatures[index] for index in ordered]) == signature).mean(axis=1)
+            best = int(np.argmax(similarity))
+            if similarity[best] >= threshold:
+                match = ordered[best]
+
+        source_id = _source_ref(chunk)
+        source_name = str(chunk["metadata"].get("name") or chunk["metadata"].get("type") or "")
+        if match is None:
+            representative = {**chunk, "metadata": {**chunk["metadata"]}}
+            representative["metadata"]["source_ids"] = [source_id]
+            representative["metadata"]["source_names"] = [source_name]
+            representative["metadata"]["duplicate_count"] = 1
+            for key in keys:
+                buckets.setdefault(key, []).append(len(representatives))
+            representatives.append(representative)
+            # Запас на зростання числа duplicate_count до 10 цифр
+            metadata_sizes.append(_json_size({**representative["metadata"], "content": chunk["content"]}) + 9)
+            signatures.append(signature)
+        else:
+            metadata = representatives[match]["metadata"]
+            metadata["duplicate_count"] += 1
+            # Ліміт розміру metadata у векторному індексі (+ роздільники ", " в обох списках)
+            added = _json_size(source_id) + _json_size(source_name) + 4
+            if len(metadata["source_ids"]) < max_sources and metadata_sizes[match] + added <= max_metadata_bytes:
+                metadata["source_ids"].append(source_id)
+                metadata["source_names"].append(source_name)
+                metadata_sizes[match] += added
+
+    if chunks:
+        logger.info(
+            f"Дедуплікація: {len(chunks)} chunks -> {len(representatives)} векторів "
+            f"({1 - len(representatives) / len(chunks):.1%} дублікатів)"
+        )
+    return representatives
+
+
+def _source_ref(chunk: Dict) -> str:
+    metadata = chunk["metadata"]
+    if metadata.get("table") and metadata.get("id"):
+        return f"{metadata['table']}:{metadata['id']}"
+    return chunk["id"]
@@ -0,0 +1,292 @@
+"""
+OnboardAI Document Ingest - Потокова векторизація великих документів (Markdown/HTML/текст)
+
+Завантаження зберігається у тимчасовий файл, API одразу відповідає 202, а векторизація
+виконується у фоні: файл читається блоками, текст розбивається тим же splitter-ом, що й
+chunk_document, а chunks векторизуються і записуються в індекс батчами по мірі появи.
+У пам'яті одночасно лише блок читання, хвіст буфера splitter-а та не більше двох батчів chunks.
+"""
+
+import os
+import re
+import json
+import time
+import codecs
+import shutil
+import asyncio
+import tempfile
+import hashlib
+import logging
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import AsyncIterator, Dict, List, Optional
+
+from metrics import VECTORIZATION_PROGRESS
+from resilience import reset_request_budget, start_request_budget
+from vector_service import SEARCH_GENERATION_KEY
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_KEY_PREFIX = "document_ingest:"
+
+# Теги, що завершують текстовий блок, та теги, вміст яких не індексується
+_BLOCK_TAGS = {"p", "div", "section", "article", "li", "tr", "br", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "table"}
+_SKIP_TAGS = {"script", "style", "noscript", "template", "head"}
+
+
+def document_id_for(name: str) -> str:
+    """Стабільний id документа за назвою файлу (повторне завантаження замінює попередню версію)"""
+    slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")[:48] or "document"
+    return f"doc-{slug}-{hashlib.sha1(name.encode()).hexdigest()[:8]}"
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """Інкрементальне витягнення тексту з HTML (feed по блоках, накопичений текст забирається drain)"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self._parts.append("\n\n" if tag.startswith("h") or tag == "p" else "\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(data)
+
+    def drain(self) -> str:
+        text = "".join(self._parts)
+        self._parts = []
+        # Відступи розмітки не несуть змісту
+        return re.sub(r"[ \t\r\f\v]+", " ", re.sub(r"\n\s*\n\s*\n+", "\n\n", text))
+
+
+async def iter_text(upload, document_format: str, read_size: int) -> AsyncIterator[str]:
+    """Текст документа блоками: інкрементальне декодування UTF-8 та (для HTML) парсинг розмітки"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parser = _HTMLTextExtractor() if document_format == "html" else None
+    while True:
+        data = await upload.read(read_size)
+        text = decoder.decode(data, final=not data)
+        if parser:
+            parser.feed(text)
+            if not data:
+                parser.close()
+            text = parser.drain()
+        if text:
+            yield text
+        if not data:
+            return
+
+
+class StreamingChunker:
+    """
+    Розбивка потоку тексту splitter-ом chunk_document без накопичення всього документа
+
+    Буфер розбивається, щойно перевищує кілька chunk_size; останній chunk лишається в буфері
+    і склеюється з наступним текстом, тож межі блоків читання не розривають речення.
+    """
+
+    def __init__(self, splitter, chunk_size: int):
+        self.splitter = splitter
+        self.chunk_size = chunk_size
+        self.threshold = chunk_size * 4
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        if len(self._buffer) < self.threshold:
+            return []
+        chunks = self.splitter.split_text(self._buffer)
+        if len(chunks) < 2:
+            # Текст без роздільників (наприклад, base64 у розмітці) - жорстка розбивка, щоб буфер не ріс
+            chunks = [self._buffer[i:i + self.chunk_size] for i in range(0, len(self._buffer), self.chunk_size)]
+        self._buffer = chunks[-1]
+        return chunks[:-1]
+
+    def finish(self) -> List[str]:
+        chunks = self.splitter.split_text(self._buffer) if self._buffer.strip() else []
+        self._buffer = ""
+        return chunks
+
+
+class DocumentIngestor:
+    """Потокова векторизація завантаженого документа з прогресом у Redis"""
+
+    def __init__(self, service):
+        self.service = service
+        self.redis_client = service.redis_client
+
+        # Параметри потокової обробки
+        self.read_size = int(os.getenv("DOCUMENT_INGEST_READ_BYTES", "65536"))
+        self.batch_size = int(os.getenv("DOCUMENT_INGEST_BATCH_SIZE", "64"))
+        self.progress_ttl = int(os.getenv("DOCUMENT_INGEST_PROGRESS_TTL", "86400"))
+        self.budget_seconds = float(os.getenv("DOCUMENT_INGEST_BUDGET_SECONDS", "3600"))
+
+    def progress(self, document_id: str) -> Optional[Dict]:
+        raw = self.redis_client.get(f"{PROGRESS_KEY_PREFIX}{document_id}")
+        return json.loads(raw) if raw else None
+
+    async def save_upload(self, upload) -> str:
+        """Копіювання завантаження у власний тимчасовий файл (UploadFile закривається разом із запитом)"""
+        def copy():
+            with tempfile.NamedTemporaryFile(prefix="document-ingest-", delete=False) as target:
+                shutil.copyfileobj(upload.file, target, self.read_size)
+                return target.name
+
+        return await asyncio.to_thread(copy)
+
+    def queue(self, document_id: str, name: str, total_bytes: int) -> Dict:
+        """Початковий стан прогресу - доступний до старту фонової векторизації"""
+        state = {
+            "document_id": document_id,
+            "name": name,
+            "status": "queued",
+            "bytes_read": 0,
+            "total_bytes": total_bytes,
+            "chunks": 0,
+            "vectors_stored": 0,
+        }
+        self._report(state)
+        return state
+
+    async def ingest_file(self, path: str, name: str, document_format: str, document_id: str) -> Optional[Dict]:
+        """Фонова векторизація збереженого файлу; помилка лишається в прогресі, файл видаляється"""
+        try:
+            with open(path, "rb") as f:
+                return await self.ingest(_FileReader(f, os.path.getsize(path)), name, document_format, document_id)
+        except Exception as e:
+            logger.error(f"Помилка векторизації документа {name}: {e}")
+            return None
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _report(self, state: Dict):
+        try:
+            self.redis_client.setex(f"{PROGRESS_KEY_PREFIX}{state['document_id']}", self.progress_ttl, json.dumps(state))
+        except Exception as e:
+            logger.warning(f"Не вдалося зберегти прогрес документа: {e}")
+        if state.get("total_bytes"):
+            VECTORIZATION_PROGRESS.labels("document").set(min(1.0, state["bytes_read"] / state["total_bytes"]))
+
+    async def _store(self, state: Dict, batch: List[Dict]):
+        state["vectors_stored"] += await self.service.store_chunks(batch)
+        self._report(state)
+
+    async def ingest(self, upload, name: str, document_format: str, document_id: Optional[str] = None) -> Dict:
+        """
+        Потокова векторизація документа
+
+        Поки батч N векторизується й записується, читається і розбивається текст для батчу N+1.
+        Після завершення видаляються chunks попередньої версії документа, яких немає в новій.
+        Замість бюджету HTTP запиту діє власний бюджет DOCUMENT_INGEST_BUDGET_SECONDS.
+        """
+        budget_token = start_request_budget(self.budget_seconds)
+        try:
+            return await self._ingest(upload, name, document_format, document_id)
+        finally:
+            reset_request_budget(budget_token)
+
+    async def _ingest(self, upload, name: str, document_format: str, document_id: Optional[str]) -> Dict:
+        document_id = document_id or document_id_for(name)
+        state = {
+            "document_id": document_id,
+            "name": name,
+            "status": "processing",
+            "bytes_read": 0,
+            "total_bytes": getattr(upload, "size", None),
+            "chunks": 0,
+            "vectors_stored": 0,
+            "started_at": datetime.now().isoformat(),
+        }
+        self._report(state)
+        VECTORIZATION_PROGRESS.labels("document").set(0)
+
+        start = time.monotonic()
+        chunker = StreamingChunker(self.service.text_splitter, self.service.chunk_size)
+        metadata = {"type": "document", "source": "upload", "document_id": document_id, "name": name}
+
+        batch: List[Dict] = []
+        pending: Optional[asyncio.Task] = None
+
+        async def flush():
+            nonlocal batch, pending
+            if pending:
+                await pending
+            pending = asyncio.create_task(self._store(state, batch)) if batch else None
+            batch = []
+
+        try:
+            async for text in iter_text(_CountingReader(upload, state), document_format, self.read_size):
+                for content in chunker.feed(text):
+                    batch.append(self._chunk(document_id, state, content, metadata))
+                    if len(batch) >= self.batch_size:
+                        await flush()
+            for content in chunker.finish():
+                batch.append(self._chunk(document_id, state, content, metadata))
+            await flush()
+            if pending:
+                await pending
+
+            removed = await asyncio.to_thread(self.service.delete_stale_chunks, document_id, state["chunks"])
+        except Exception as e:
+            if pending:
+                pending.cancel()
+            state.update(status="error", error=str(e))
+            self._report(state)
+            raise
+
+        # Нове покоління індексу - закешовані результати пошуку більше не використовуються
+        self.redis_client.incr(SEARCH_GENERATION_KEY)
+        state.update(
+            status="completed",
+            stale_chunks_removed=removed,
+            seconds=round(time.monotonic() - start, 3),
+            completed_at=datetime.now().isoformat(),
+        )
+        self._report(state)
+        logger.info(f"Документ {name}: {state['chunks']} chunks за {state['seconds']} с")
+        return state
+
+    @staticmethod
+    def _chunk(document_id: str, state: Dict, content: str, metadata: Dict) -> Dict:
+        index = state["chunks"]
+        state["chunks"] += 1
+        return {"id": f"{document_id}#{index}", "content": content, "metadata": {**metadata, "chunk_index": index}}
+
+
+class _FileReader:
+    """Асинхронне читання локального файлу блоками (читання диска - у потоці)"""
+
+    def __init__(self, f, size: int):
+        self._file = f
+        self.size = size
+
+    async def read(self, size: int) -> bytes:
+        return await asyncio.to_thread(self._file.read, size)
+
+
+class _CountingReader:
+    """Обгортка джерела документа, що рахує прочитані байти для прогресу"""
+
+    def __init__(self, upload, state: Dict):
+        self._upload = upload
+        self._state = state
+
+    async def read(self, size: int) -> bytes:
+        data = await self._upload.read(size)
+        self._state["bytes_read"] += len(data)
+        return data
@@ -0,0 +1,57 @@
+"""
+OnboardAI HTTP Clients - Спільні пул-з'єднання httpx для викликів MCP серверів
+"""
+
+import os
+from typing import Dict
+
+import httpx
+
+MCP_JIRA_HOST = os.getenv("MCP_JIRA_HOST", "http://mcp-jira:3001")
+MCP_NOTION_HOST = os.getenv("MCP_NOTION_HOST", "http://mcp-notion:3002")
+
+# Ліміти та таймаути для кожного хоста окремо
+HOST_SETTINGS = {
+    "jira": {
+        "base_url": MCP_JIRA_HOST,
+        "timeout": float(os.getenv("MCP_JIRA_TIMEOUT", "10.0")),
+        "max_connections": int(os.getenv("MCP_JIRA_MAX_CONNECTIONS", "20")),
+    },
+    "notion": {
+        "base_url": MCP_NOTION_HOST,
+        "timeout": float(os.getenv("MCP_NOTION_TIMEOUT", "5.0")),
+        "max_connections": int(os.getenv("MCP_NOTION_MAX_CONNECTIONS", "50")),
+    },
+}
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _build_client(settings: Dict) -> httpx.AsyncClient:
+    """Створення клієнта з пулом з'єднань (HTTP/2 узгоджується для https хостів)"""
+    return httpx.AsyncClient(
+        base_url=settings["base_url"],
+        http2=True,
+        timeout=httpx.Timeout(settings["timeout"], connect=2.0),
+        limits=httpx.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_connections"],
+            keepalive_expiry=30.0,
+        ),
+    )
+
+
+def get_client(host: str) -> httpx.AsyncClient:
+    """Отримання спільного клієнта для MCP хоста ("jira" або "notion")"""
+    client = _clients.get(host)
+    if client is None or client.is_closed:
+        client = _build_client(HOST_SETTINGS[host])
+        _clients[host] = client
+    return client
+
+
+async def close_clients():
+    """Закриття всіх клієнтів при зупинці додатку"""
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
@@ -0,0 +1,223 @@
+"""
+OnboardAI Index Migration - Міграція моделі embeddings через тіньовий індекс без зупинки пошуку
+
+Етапи:
+    start   створення версіонованого тіньового індексу ({PINECONE_INDEX_NAME}-v{N}) для нової моделі
+    run     фонове перевкладення текстів chunks активного індексу в тіньовий (BULK пріоритет, з курсором)
+    switch  атомарне перемикання аліасу активного індексу на тіньовий
+    gc      видалення попередніх індексів після grace-періоду
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from metrics import INDEX_QUERY_LATENCY
+from rate_limiter import BULK
+from vector_service import (
+    ACTIVE_INDEX_KEY,
+    DUAL_READ_STATS_KEY,
+    EMBEDDING_DIMENSIONS,
+    SEARCH_GENERATION_KEY,
+    SHADOW_INDEX_KEY,
+)
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "vector_index:version"
+RETIRED_KEY = "vector_index:retired"
+LOCK_KEY = "vector_index:migration:lock"
+
+
+class IndexMigration:
+    """Керування версіями індексу: тіньовий індекс, перевкладення, перемикання аліасу та збір сміття"""
+
+    def __init__(self, service):
+        self.service = service
+        self.redis_client = service.redis_client
+
+        # Параметри міграції
+        self.batch_size = int(os.getenv("INDEX_MIGRATION_BATCH_SIZE", "100"))
+        self.pause_seconds = float(os.getenv("INDEX_MIGRATION_PAUSE_SECONDS", "0.5"))
+        self.retire_grace_seconds = int(os.getenv("INDEX_RETIRE_GRACE_SECONDS", "3600"))
+        self.lock_seconds = int(os.getenv("INDEX_MIGRATION_LOCK_SECONDS", "300"))
+
+    def _save_shadow(self, shadow: Dict):
+        self.redis_client.set(SHADOW_INDEX_KEY, json.dumps(shadow))
+
+    def status(self) -> Dict:
+        """Активний, тіньовий та виведені індекси і накопичене порівняння dual-read"""
+        self.service.refresh_active_index(force=True)
+        stats = {key.decode(): float(value) for key, value in self.redis_client.hgetall(DUAL_READ_STATS_KEY).items()}
+        queries = stats.get("queries", 0)
+        return {
+            "active": {
+                "index": self.service.pinecone_index_name,
+                "model": self.service.embedding_model,
+                "dimension": self.service.embedding_dimension,
+            },
+            "shadow": self.service.shadow_index_state(),
+            "retired": [json.loads(item) for item in self.redis_client.lrange(RETIRED_KEY, 0, -1)],
+            "dual_read": {
+                "queries": int(queries),
+                "avg_overlap": round(stats["overlap_sum"] / queries, 4) if queries else None,
+                "avg_active_latency_ms": round(stats["active_latency_sum"] / queries * 1000, 1) if queries else None,
+                "avg_shadow_latency_ms": round(stats["shadow_latency_sum"] / queries * 1000, 1) if queries else None,
+            },
+        }
+
+    async def start(self, model: str, dimension: Optional[int] = None) -> Dict:
+        """Створення тіньового індексу для нової моделі (одна міграція одночасно)"""
+        if self.service.shadow_index_state():
+            raise ValueError("Міграція індексу вже виконується")
+        dimension = dimension or EMBEDDING_DIMENSIONS.get(model)
+        if not dimension:
+            raise ValueError(f"Невідома розмірність embeddings для моделі {model}")
+
+        self.service.refresh_active_index(force=True)
+        version = self.redis_client.incr(VERSION_KEY)
+        base_name = os.getenv("PINECONE_INDEX_NAME", "onboardai-knowledge")
+        shadow = {
+            "index": f"{base_name}-v{version}",
+            "model": model,
+            "dimension": dimension,
+            "source_index": self.service.pinecone_index_name,
+            "status": "building",
+            "cursor": None,
+            "processed": 0,
+            "skipped": 0,
+            "started_at": datetime.now().isoformat(),
+        }
+        await self.service.ensure_index(shadow["index"], dimension)
+        self._save_shadow(shadow)
+        self.redis_client.delete(DUAL_READ_STATS_KEY)
+        logger.info(f"Міграція індексу: тіньовий індекс {shadow['index']} ({model}, {dimension})")
+        return shadow
+
+    async def run(self) -> Optional[Dict]:
+        """
+        Перевкладення chunks активного індексу в тіньовий (None якщо виконується іншим воркером)
+
+        Прогрес і курсор сторінок зберігаються після кожного батчу, тож перерваний прогін
+        продовжується з того ж місця. Швидкість обмежує спільний rate limiter (BULK поступається
+        інтерактивним запитам) та пауза між батчами.
+        """
+        if not self.redis_client.set(LOCK_KEY, "1", nx=True, ex=self.lock_seconds):
+            return None
+        try:
+            shadow = self.service.shadow_index_state()
+            if not shadow or shadow["status"] != "building":
+                return shadow
+
+            source = self.service.pc.Index(shadow["source_index"])
+            target = self.service.pc.Index(shadow["index"])
+            while True:
+                page = await asyncio.to_thread(
+                    source.list_paginated, limit=self.batch_size, pagination_token=shadow["cursor"]
+                )
+                ids = [vector.id for vector in page.vectors]
+                if ids:
+                    with INDEX_QUERY_LATENCY.labels("fetch").time():
+                        fetched = (await asyncio.to_thread(source.fetch, ids=ids)).vectors
+                    await self._reembed(shadow, target, [fetched[vector_id] for vector_id in ids if vector_id in fetched])
+
+                # Скасування міграції під час прогону
+                current = self.service.shadow_index_state()
+                if not current or current["index"] != shadow["index"]:
+                    return None
+                shadow["cursor"] = page.pagination.next if page.pagination else None
+                if not shadow["cursor"]:
+                    shadow["status"] = "ready"
+                    shadow["completed_at"] = datetime.now().isoformat()
+                self._save_shadow(shadow)
+                self.redis_client.expire(LOCK_KEY, self.lock_seconds)
+
+                if shadow["status"] == "ready":
+                    logger.info(f"Міграція індексу: {shadow['index']} готовий ({shadow['processed']} векторів)")
+                    return shadow
+                await asyncio.sleep(self.pause_seconds)
+        finally:
+            self.redis_client.delete(LOCK_KEY)
+
+    async def _reembed(self, shadow: Dict, target, vectors: List):
+        # Вектори без тексту (записані до збереження content у metadata) перевкласти неможливо
+        with_content = [vector for vector in vectors if (vector.metadata or {}).get("content")]
+        shadow["skipped"] += len(vectors) - len(with_content)
+        if not with_content:
+            return
+
+        embeddings = await self.service.create_embeddings(
+            [vector.metadata["content"] for vector in with_content],
+            timeout=300.0,
+            priority=BULK,
+            model=shadow["model"],
+        )
+        if len(embeddings) != len(with_content):
+            # Батч не просунув курсор - повтор з того ж місця на наступному прогоні
+            raise RuntimeError("Не вдалося створити embeddings для батчу міграції")
+
+        with INDEX_QUERY_LATENCY.labels("upsert").time():
+            await asyncio.to_thread(target.upsert, vectors=[
+                {"id": vector.id, "values": embedding, "metadata": vector.metadata}
+                for vector, embedding in zip(with_content, embeddings)
+            ])
+        shadow["processed"] += len(with_content)
+
+    def switch(self, force: bool = False) -> Dict:
+        """Атомарне перемикання аліасу на тіньовий індекс; попередній індекс виводиться для gc"""
+        shadow = self.service.shadow_index_state()
+        if not shadow:
+            raise ValueError("Немає тіньового індексу для перемикання")
+        if shadow["status"] != "ready" and not force:
+            raise ValueError(f"Тіньовий індекс ще не готовий: {shadow['processed']} векторів оброблено")
+
+        self.service.refresh_active_index(force=True)
+        active = {"index": shadow["index"], "model": shadow["model"], "dimension": shadow["dimension"]}
+        retired = {"index": self.service.pinecone_index_name, "retired_at": time.time()}
+
+        # Одна транзакція: усі воркери бачать або старий, або новий стан
+        pipe = self.redis_client.pipeline(transaction=True)
+        pipe.set(ACTIVE_INDEX_KEY, json.dumps(active))
+        pipe.rpush(RETIRED_KEY, json.dumps(retired))
+        pipe.delete(SHADOW_INDEX_KEY)
+        pipe.incr(SEARCH_GENERATION_KEY)
+        pipe.execute()
+
+        self.service.refresh_active_index(force=True)
+        logger.info(f"Міграція індексу: активний індекс {retired['index']} -> {active['index']}")
+        return active
+
+    def abort(self) -> Optional[Dict]:
+        """Скасування міграції; тіньовий індекс виводиться для gc"""
+        shadow = self.service.shadow_index_state()
+        if not shadow:
+            return None
+        pipe = self.redis_client.pipeline(transaction=True)
+        pipe.delete(SHADOW_INDEX_KEY)
+        pipe.rpush(RETIRED_KEY, json.dumps({"index": shadow["index"], "retired_at": time.time()}))
+        pipe.execute()
+        return shadow
+
+    def collect_garbage(self) -> List[str]:
+        """Видалення виведених індексів після grace-періоду (воркери встигають перечитати аліас)"""
+        self.service.refresh_active_index(force=True)
+        deleted = []
+        for raw in self.redis_client.lrange(RETIRED_KEY, 0, -1):
+            retired = json.loads(raw)
+            if time.time() - retired["retired_at"] < self.retire_grace_seconds:
+                continue
+            if retired["index"] != self.service.pinecone_index_name:
+                try:
+                    self.service.pc.delete_index(retired["index"])
+                except Exception as e:
+                    logger.warning(f"Не вдалося видалити індекс {retired['index']}: {e}")
+                    continue
+                deleted.append(retired["index"])
+            self.redis_client.lrem(RETIRED_KEY, 1, raw)
+        if deleted:
+            logger.info(f"Видалено виведені індекси: {deleted}")
+        return deleted
@@ -0,0 +1,258 @@
+"""
+OnboardAI Jira Outbox - Надійна черга синхронізації з Jira на Redis (батчі, ретраї, dead-letter)
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+from typing import Dict, List
+
+from resilience import breakers
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "jira_outbox:pending"
+RETRY_KEY = "jira_outbox:retry"
+PROCESSING_KEY = "jira_outbox:processing"
+DEAD_KEY = "jira_outbox:dead"
+IDEMPOTENCY_PREFIX = "jira_outbox:key:"
+
+# Атомарне взяття батчу: записи переносяться в processing з часом оренди
+CLAIM_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #items > 0 then
+  redis.call('LTRIM', KEYS[1], #items, -1)
+  for _, item in ipairs(items) do
+    local entry = cjson.decode(item)
+    redis.call('HSET', KEYS[2], entry['idempotency_key'], item)
+    redis.call('ZADD', KEYS[3], ARGV[2], entry['idempotency_key'])
+  end
+end
+return items
+"""
+
+# Перенесення записів, час повтору яких настав, назад у pending
+PROMOTE_SCRIPT = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, item in ipairs(items) do
+  redis.call('ZREM', KEYS[1], item)
+  redis.call('RPUSH', KEYS[2], item)
+end
+return #items
+"""
+
+# Атомарний запис намірів: idempotency key та запис у pending з'являються лише разом
+# KEYS[1] - pending, KEYS[2..] - idempotency keys; ARGV[1] - TTL ключів, ARGV[2..] - записи
+ENQUEUE_SCRIPT = """
+local queued = 0
+for i = 2, #KEYS do
+  if redis.call('SET', KEYS[i], '1', 'NX', 'EX', tonumber(ARGV[1])) then
+    redis.call('RPUSH', KEYS[1], ARGV[i])
+    queued = queued + 1
+  end
+end
+return queued
+"""
+
+# Атомарне завершення невдалої спроби: запис з processing переходить у retry або dead-letter
+# (нічого не робить, якщо оренду вже повернуто в pending)
+FAIL_SCRIPT = """
+if redis.call('HDEL', KEYS[1], ARGV[1]) == 0 then
+  return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+if ARGV[3] == 'dead' then
+  redis.call('RPUSH', KEYS[3], ARGV[2])
+else
+  redis.call('ZADD', KEYS[4], ARGV[4], ARGV[2])
+end
+return 1
+"""
+
+# Повернення записів з простроченою орендою (воркер впав під час відправки) у pending
+RECOVER_SCRIPT = """
+local keys = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, key in ipairs(keys) do
+  local item = redis.call('HGET', KEYS[1], key)
+  redis.call('HDEL', KEYS[1], key)
+  redis.call('ZREM', KEYS[2], key)
+  if item then
+    redis.call('RPUSH', KEYS[3], item)
+  end
+end
+return #keys
+"""
+
+
+def idempotency_key(employee_id: str, role: str, action: str) -> str:
+    return hashlib.sha1(f"{employee_id}|{role}|{action}".encode()).hexdigest()
+
+
+class JiraOutbox:
+    """Outbox намірів синхронізації з Jira та воркер, що відправляє їх батчами"""
+
+    def __init__(self, redis_client, jira_client_factory):
+        self.redis_client = redis_client
+        self.jira_client_factory = jira_client_factory
+
+        # Параметри відправки
+        self.batch_size = int(os.getenv("JIRA_OUTBOX_BATCH_SIZE", "50"))
+        self.poll_interval = float(os.getenv("JIRA_OUTBOX_POLL_SECONDS", "1.0"))
+        self.max_attempts = int(os.getenv("JIRA_OUTBOX_MAX_ATTEMPTS", "8"))
+        self.base_backoff = float(os.getenv("JIRA_OUTBOX_BASE_BACKOFF_SECONDS", "2.0"))
+        self.max_backoff = float(os.getenv("JIRA_OUTBOX_MAX_BACKOFF_SECONDS", "600"))
+        self.lease_seconds = float(os.getenv("JIRA_OUTBOX_LEASE_SECONDS", "120"))
+        self.idempotency_ttl = int(os.getenv("JIRA_OUTBOX_IDEMPOTENCY_TTL", "86400"))
+
+        self._claim = redis_client.register_script(CLAIM_SCRIPT)
+        self._promote = redis_client.register_script(PROMOTE_SCRIPT)
+        self._enqueue = redis_client.register_script(ENQUEUE_SCRIPT)
+        self._fail_script = redis_client.register_script(FAIL_SCRIPT)
+        self._recover = redis_client.register_script(RECOVER_SCRIPT)
+        self._worker = None
+
+    def enqueue_many(self, intents: List[Dict]) -> int:
+        """Запис намірів синхронізації; повторні наміри відкидаються по idempotency key"""
+        keys = []
+        entries = []
+        for intent in intents:
+            action = intent.get("action", "create_onboarding_tasks")
+            key = idempotency_key(intent["employee_id"], intent["role"], action)
+            keys.append(f"{IDEMPOTENCY_PREFIX}{key}")
+            entries.append(json.dumps({
+                "idempotency_key": key,
+                "employee_id": intent["employee_id"],
+                "role": intent["role"],
+                "action": action,
+                "attempts": 0,
+                "created_at": time.time(),
+            }))
+        if not entries:
+            return 0
+        return int(self._enqueue(keys=[PENDING_KEY, *keys], args=[self.idempotency_ttl, *entries]))
+
+    def enqueue(self, employee_id: str, role: str, action: str = "create_onboarding_tasks") -> bool:
+        return self.enqueue_many([{"employee_id": employee_id, "role": role, "action": action}]) == 1
+
+    def stats(self) -> Dict:
+        pipe = self.redis_client.pipeline()
+        pipe.llen(PENDING_KEY)
+        pipe.zcard(RETRY_KEY)
+        pipe.hlen(PROCESSING_KEY)
+        pipe.llen(DEAD_KEY)
+        pending, retry, processing, dead = pipe.execute()
+        return {"pending": pending, "retry": retry, "processing": processing, "dead_letter": dead}
+
+    def requeue_dead(self, limit: int = 100) -> int:
+        """Повернення записів з dead-letter у чергу (після виправлення проблеми)"""
+        moved = 0
+        for _ in range(limit):
+            item = self.redis_client.lpop(DEAD_KEY)
+            if item is None:
+                break
+            entry = json.loads(item)
+            entry["attempts"] = 0
+            entry.pop("last_error", None)
+            self.redis_client.rpush(PENDING_KEY, json.dumps(entry))
+            moved += 1
+        return moved
+
+    def _recover_expired_leases(self):
+        """Записи, воркер яких впав під час відправки, повертаються в pending"""
+        self._recover(
+            keys=[PROCESSING_KEY, f"{PROCESSING_KEY}:leases", PENDING_KEY],
+            args=[time.time() - self.lease_seconds],
+        )
+
+    def _finish(self, entry: Dict):
+        pipe = self.redis_client.pipeline()
+        pipe.hdel(PROCESSING_KEY, entry["idempotency_key"])
+        pipe.zrem(f"{PROCESSING_KEY}:leases", entry["idempotency_key"])
+        pipe.execute()
+
+    def _fail(self, entry: Dict, error: str):
+        """Експоненційний backoff з jitter або dead-letter після max_attempts"""
+        entry["attempts"] += 1
+        entry["last_error"] = error[:500]
+        dead = entry["attempts"] >= self.max_attempts
+        delay = min(self.max_backoff, self.base_backoff * (2 ** (entry["attempts"] - 1)))
+        delay *= random.uniform(0.5, 1.0)
+        self._fail_script(
+            keys=[PROCESSING_KEY, f"{PROCESSING_KEY}:leases", DEAD_KEY, RETRY_KEY],
+            args=[entry["idempotency_key"], json.dumps(entry), "dead" if dead else "retry", time.time() + delay],
+        )
+        if dead:
+            logger.error(f"Jira синхронізація {entry['employee_id']} перенесена в dead-letter: {error}")
+
+    async def _post_batch(self, payload: Dict):
+        response = await self.jira_client_factory().post("/api/jira/sync/batch", json=payload)
+        # 5xx рахується breaker-ом як помилка залежності
+        response.raise_for_status()
+        return response
+
+    async def drain_once(self) -> int:
+        """Одна ітерація: повтори, що настали, + відправка одного батчу"""
+        self._promote(keys=[RETRY_KEY, PENDING_KEY], args=[time.time(), self.batch_size * 10])
+        self._recover_expired_leases()
+
+        # Поки MCP Jira недоступний, записи залишаються в pending без витрати спроб
+        if not breakers["mcp_jira"].available():
+            return 0
+
+        raw_items = self._claim(
+            keys=[PENDING_KEY, PROCESSING_KEY, f"{PROCESSING_KEY}:leases"],
+            args=[self.batch_size, time.time()],
+        )
+        if not raw_items:
+            return 0
+        entries = [json.loads(item) for item in raw_items]
+
+        try:
+            payload = {"items": [
+                {key: entry[key] for key in ("idempotency_key", "employee_id", "role", "action")}
+                for entry in entries
+            ]}
+            response = await breakers["mcp_jira"].call(
+                lambda: self._post_batch(payload)
+            )
+            results = {result["idempotency_key"]: result for result in response.json().get("results", [])}
+        except Exception as e:
+            for entry in entries:
+                self._fail(entry, f"{type(e).__name__}: {e}")
+            return 0
+
+        synced = 0
+        for entry in entries:
+            result = results.get(entry["idempotency_key"])
+            if result and result.get("success"):
+                self._finish(entry)
+                synced += 1
+            else:
+                self._fail(entry, (result or {}).get("error", "Відсутній результат у відповіді MCP Jira"))
+        return synced
+
+    async def run(self):
+        """Фоновий воркер: безперервно вичерпує outbox"""
+        while True:
+            try:
+                synced = await self.drain_once()
+                if synced < self.batch_size:
+                    await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Помилка воркера Jira outbox: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._worker:
+            self._worker.cancel()
+            self._worker = None
@@ -0,0 +1,148 @@
+"""
+OnboardAI Metrics - Prometheus метрики та вимірювання часу етапів API і VectorService
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+# Межі гістограм (секунди): від кешованих відповідей до повільних LLM викликів
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Таблиці Supabase, які можуть потрапити в мітки (обмеження кардинальності)
+KNOWN_TABLES = {
+    "employees", "onboarding_tasks", "onboarding_progress", "organizations",
+    "integrations", "resources", "knowledge_base", "qa_interactions",
+    "onboarding_summary", "qa_analytics_rollups", "qa_question_rollups",
+}
+
+# HTTP запити до API (мітка route - шаблон маршруту, а не фактичний шлях)
+HTTP_REQUEST_LATENCY = Histogram(
+    "onboardai_http_request_seconds",
+    "Тривалість обробки HTTP запитів",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Етапи VectorService
+EMBEDDING_LATENCY = Histogram(
+    "onboardai_embedding_seconds",
+    "Тривалість створення embeddings через OpenAI",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+INDEX_QUERY_LATENCY = Histogram(
+    "onboardai_index_query_seconds",
+    "Тривалість операцій з векторним індексом",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+INDEX_DUAL_READ_OVERLAP = Histogram(
+    "onboardai_index_dual_read_overlap",
+    "Частка результатів активного індексу, знайдених і тіньовим індексом (overlap@k)",
+    buckets=(0.0, 0.2, 0.4, 0.6, 0.8, 0.9, 1.0),
+)
+CHAT_COMPLETION_LATENCY = Histogram(
+    "onboardai_chat_completion_seconds",
+    "Тривалість генерації відповіді LLM",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+OPENAI_LIMITER_WAIT = Histogram(
+    "onboardai_openai_limiter_wait_seconds",
+    "Час очікування дозволу спільного rate limiter-а OpenAI",
+    ["model", "priority"],
+    buckets=(0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+SUPABASE_QUERY_LATENCY = Histogram(
+    "onboardai_supabase_query_seconds",
+    "Тривалість запитів до Supabase",
+    ["table", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Лічильники
+EMBEDDING_TOKENS = Counter(
+    "onboardai_embedding_tokens_total",
+    "Кількість токенів, витрачених на embeddings",
+    ["model"],
+)
+CACHE_REQUESTS = Counter(
+    "onboardai_cache_requests_total",
+    "Звернення до кешу за результатом (hit/miss)",
+    ["cache", "result"],
+)
+OPENAI_RATE_LIMITED = Counter(
+    "onboardai_openai_rate_limited_total",
+    "Відповіді OpenAI 429 (після яких всі процеси призупиняють виклики моделі)",
+    ["model"],
+)
+QA_LOG_EVENTS = Counter(
+    "onboardai_qa_log_events_total",
+    "Записи Q&A історії у write-behind буфері (flushed/dropped)",
+    ["result"],
+)
+KNOWLEDGE_BASE_FALLBACKS = Counter(
+    "onboardai_knowledge_base_fallbacks_total",
+    "Кількість переходів на search_knowledge_base замість векторного пошуку",
+    ["reason"],
+)
+
+# Поточний стан
+VECTOR_COUNT = Gauge(
+    "onboardai_vector_count",
+    "Кількість векторів в індексі",
+    multiprocess_mode="max",
+)
+VECTORIZATION_PROGRESS = Gauge(
+    "onboardai_vectorization_progress_ratio",
+    "Прогрес поточної векторизації (0..1) по етапах",
+    ["stage"],
+    multiprocess_mode="max",
+)
+
+
+def table_label(table: str) -> str:
+    """Нормалізація назви таблиці для мітки метрики"""
+    return table if table in KNOWN_TABLES else "other"
+
+
+@contextmanager
+def observe_supabase(table: str, operation: str):
+    """Вимірювання тривалості запиту до Supabase"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        SUPABASE_QUERY_LATENCY.labels(table_label(table), operation).observe(time.perf_counter() - start)
+
+
+def record_cache(cache: str, hit: bool):
+    """Облік звернення до кешу"""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def route_label(request) -> str:
+    """Шаблон маршруту FastAPI для мітки (без ідентифікаторів у шляху)"""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def render_latest() -> tuple:
+    """Серіалізація метрик для /metrics з підтримкою кількох uvicorn воркерів"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,199 @@
+"""
+OnboardAI Organization Cache - Кешування пошуку організації DocuMinds по домену
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from metrics import observe_supabase, record_cache
+
+logger = logging.getLogger(__name__)
+
+# Маркер "домен не знайдено" для негативного кешування
+_MISSING = "__missing__"
+
+# Покоління кешу: інвалідація збільшує його, і кожен воркер скидає свій LRU
+GENERATION_KEY = "org_cache:generation"
+
+# Останній оброблений запис журналу organization_changes (спільний для воркерів)
+CHANGES_CURSOR_KEY = "org_cache:changes_cursor"
+
+
+class OrganizationCache:
+    """Двохрівневий кеш організацій: LRU в процесі + Redis з TTL"""
+
+    def __init__(self, supabase, redis_client):
+        self.supabase = supabase
+        self.redis_client = redis_client
+
+        # Параметри кешу
+        self.max_entries = int(os.getenv("ORG_CACHE_MAX_ENTRIES", "1024"))
+        self.local_ttl = int(os.getenv("ORG_CACHE_LOCAL_TTL", "30"))
+        self.redis_ttl = int(os.getenv("ORG_CACHE_REDIS_TTL", "600"))
+        self.negative_ttl = int(os.getenv("ORG_CACHE_NEGATIVE_TTL", "60"))
+        self.generation_check_seconds = float(os.getenv("ORG_CACHE_GENERATION_CHECK_SECONDS", "1"))
+
+        # domain -> (expires_at, organization або None)
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generation: Optional[int] = None
+        self._generation_checked_at = 0.0
+
+    def _redis_key(self, domain: str) -> str:
+        return f"org_by_domain:{domain}"
+
+    def _check_generation(self):
+        """Скидання LRU, якщо інший воркер інвалідував кеш (Redis читається не частіше generation_check_seconds)"""
+        now = time.monotonic()
+        if now - self._generation_checked_at < self.generation_check_seconds:
+            return
+        self._generation_checked_at = now
+        try:
+            generation = int(self.redis_client.get(GENERATION_KEY) or 0)
+        except Exception as e:
+            logger.warning(f"Redis недоступний для покоління кешу організацій: {e}")
+            return
+        # Перша перевірка лише запам'ятовує покоління (записи preload уже актуальні)
+        if self._generation is not None and generation != self._generation:
+            self._local.clear()
+        self._generation = generation
+
+    def _get_local(self, domain: str):
+        entry = self._local.get(domain)
+        if entry is None:
+            return False, None
+        expires_at, organization = entry
+        if expires_at < time.monotonic():
+            del self._local[domain]
+            return False, None
+        self._local.move_to_end(domain)
+        return True, organization
+
+    def _set_local(self, domain: str, organization: Optional[Dict]):
+        ttl = self.local_ttl if organization else min(self.local_ttl, self.negative_ttl)
+        self._local[domain] = (time.monotonic() + ttl, organization)
+        self._local.move_to_end(domain)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def _get_redis(self, domain: str):
+        try:
+            cached = self.redis_client.get(self._redis_key(domain))
+        except Exception as e:
+            logger.warning(f"Redis недоступний для кешу організацій: {e}")
+            return False, None
+        if cached is None:
+            return False, None
+        if cached in (_MISSING, _MISSING.encode()):
+            return True, None
+        return True, json.loads(cached)
+
+    def _set_redis(self, domain: str, organization: Optional[Dict]):
+        try:
+            if organization:
+                self.redis_client.setex(self._redis_key(domain), self.redis_ttl, json.dumps(organization))
+            else:
+                self.redis_client.setex(self._redis_key(domain), self.negative_ttl, _MISSING)
+        except Exception as e:
+            logger.warning(f"Не вдалося записати організацію в Redis: {e}")
+
+    def _fetch(self, domain: str) -> Optional[Dict]:
+        with observe_supabase("organizations", "select"):
+            result = self.supabase.table("organizations")\
+                .select("*")\
+                .eq("domain", domain)\
+                .limit(1)\
+                .execute()
+        return result.data[0] if result.data else None
+
+    async def resolve(self, domain: str) -> Optional[Dict]:
+        """Організація по домену або None якщо домен невідомий"""
+        self._check_generation()
+        found, organization = self._get_local(domain)
+        if found:
+            record_cache("organization_local", True)
+            return organization
+        record_cache("organization_local", False)
+
+        found, organization = self._get_redis(domain)
+        record_cache("organization_redis", found)
+        if not found:
+            # Синхронний клієнт Supabase виконується в потоці, щоб не блокувати event loop
+            organization = await asyncio.to_thread(self._fetch, domain)
+            self._set_redis(domain, organization)
+
+        self._set_local(domain, organization)
+        return organization
+
+    def invalidate(self, domain: Optional[str] = None):
+        """
+        Скидання кешу для домену або повністю (після зміни організацій)
+
+        Запис у Redis видаляється, а нове покоління змушує всі воркери скинути локальний LRU
+        (повністю - окремі домени між процесами не розсилаються).
+        """
+        if domain:
+            self._local.pop(domain, None)
+            keys = [self._redis_key(domain)]
+        else:
+            self._local.clear()
+            keys = list(self.redis_client.scan_iter(match=self._redis_key("*"), count=500))
+        pipe = self.redis_client.pipeline(transaction=True)
+        if keys:
+            pipe.delete(*keys)
+        pipe.incr(GENERATION_KEY)
+        self._generation = pipe.execute()[-1]
+
+    def _fetch_changes(self, after_id: int, limit: int) -> List[Dict]:
+        with observe_supabase("organization_changes", "select"):
+            result = self.supabase.table("organization_changes")\
+                .select("id, domain")\
+                .gt("id", after_id)\
+                .order("id")\
+                .limit(limit)\
+                .execute()
+        return result.data or []
+
+    async def sync_changes(self, limit: int = 1000) -> int:
+        """
+        Інвалідація доменів, змінених в DocuMinds після останньої перевірки
+
+        Організації пишуться поза цим сервісом, тож тригер у базі (database/schema.sql) веде журнал
+        organization_changes; курсор у Redis спільний, і новий запис бачить лише один прохід.
+        """
+        after_id = int(self.redis_client.get(CHANGES_CURSOR_KEY) or 0)
+        changes = await asyncio.to_thread(self._fetch_changes, after_id, limit)
+        if not changes:
+            return 0
+        domains = {change["domain"] for change in changes if change.get("domain")}
+        for domain in domains:
+            self._local.pop(domain, None)
+        pipe = self.redis_client.pipeline(transaction=True)
+        if domains:
+            pipe.delete(*[self._redis_key(domain) for domain in domains])
+        pipe.set(CHANGES_CURSOR_KEY, max(change["id"] for change in changes))
+        pipe.incr(GENERATION_KEY)
+        self._generation = pipe.execute()[-1]
+        logger.info(f"Кеш організацій: інвалідовано {len(domains)} змінених доменів")
+        return len(domains)
+
+    def _fetch_all(self, limit: int) -> List[Dict]:
+        with observe_supabase("organizations", "select"):
+            result = self.supabase.table("organizations").select("*").limit(limit).execute()
+        return result.data or []
+
+    async def preload(self, limit: int = 10000) -> int:
+        """Попереднє завантаження організацій в кеш при старті"""
+        organizations = await asyncio.to_thread(self._fetch_all, limit)
+        count = 0
+        for organization in organizations:
+            if organization.get("domain"):
+                self._set_local(organization["domain"], organization)
+                self._set_redis(organization["domain"], organization)
+                count += 1
+        logger.info(f"Кеш організацій: попередньо завантажено {count} доменів")
+        return count
@@ -0,0 +1,90 @@
+"""
+OnboardAI Pagination - Keyset курсори та умовні запити (ETag/Last-Modified)
+"""
+
+import base64
+import hashlib
+import json
+import uuid
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+
+def encode_cursor(position: Dict) -> str:
+    """Кодування позиції keyset пагінації в непрозорий курсор"""
+    raw = json.dumps(position, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """Декодування курсора; ValueError для пошкодженого значення"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError(f"Некоректний курсор: {e}")
+    if not isinstance(position, dict):
+        raise ValueError("Некоректний курсор")
+    return position
+
+
+def decode_timestamp_cursor(cursor: str, timestamp_field: str, id_field: str) -> Dict:
+    """
+    Курсор keyset пагінації по (час, UUID) з перевіркою значень; ValueError для некоректного
+
+    Значення курсора підставляються у фільтр PostgREST, тож приймаються лише ISO час та UUID
+    у нормалізованому вигляді (без лапок, ком та дужок).
+    """
+    position = decode_cursor(cursor)
+    try:
+        timestamp = datetime.fromisoformat(str(position[timestamp_field])).isoformat()
+        identifier = str(uuid.UUID(str(position[id_field])))
+    except (KeyError, ValueError) as e:
+        raise ValueError(f"Некоректний курсор: {e}")
+    return {timestamp_field: timestamp, id_field: identifier}
+
+
+def make_etag(*parts) -> str:
+    """
+    Слабкий ETag: SHA-1 від довільних частин, з'єднаних через "|"
+
+    Частини обирає викликач - параметри запиту та валідатори вмісту сторінки
+    (наприклад, "id@last_synced_at" кожного ресурсу), тож зміна будь-якої з них змінює ETag.
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Перевірка заголовка If-None-Match проти поточного ETag"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return "*" in candidates or any(
+        (c[2:] if c.startswith("W/") else c) == bare for c in candidates
+    )
+
+
+def http_date(timestamp: Optional[str]) -> Optional[str]:
+    """ISO час з Supabase у форматі HTTP дати для Last-Modified"""
+    if not timestamp:
+        return None
+    try:
+        modified = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        return format_datetime(modified.astimezone(timezone.utc), usegmt=True)
+    except ValueError:
+        return None
+
+
+def not_modified_since(if_modified_since: Optional[str], timestamp: Optional[str]) -> bool:
+    """Перевірка заголовка If-Modified-Since проти часу останньої зміни"""
+    if not if_modified_since or not timestamp:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+        modified = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        return modified.replace(microsecond=0) <= since
+    except (TypeError, ValueError):
+        return False
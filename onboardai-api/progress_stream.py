@@ -0,0 +1,139 @@
+"""
+OnboardAI Progress Stream - Push-оновлення прогресу через Redis pub/sub для SSE/WebSocket клієнтів
+"""
+
+import os
+import json
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "progress:"
+
+
+class ConnectionLimitError(Exception):
+    """Перевищено ліміт підписок на прогрес"""
+
+
+def publish_progress(redis_client, employee_id: str, delta: Dict):
+    """Публікація зміни прогресу для всіх воркерів (помилки Redis не блокують оновлення)"""
+    try:
+        redis_client.publish(f"{CHANNEL_PREFIX}{employee_id}", json.dumps(delta, default=str))
+    except Exception as e:
+        logger.warning(f"Не вдалося опублікувати зміну прогресу: {e}")
+
+
+class ProgressSubscription:
+    """Підписка одного клієнта з об'єднанням частих змін"""
+
+    def __init__(self, employee_id: str, coalesce_interval: float):
+        self.employee_id = employee_id
+        self.coalesce_interval = coalesce_interval
+        self._tasks: Dict[str, Dict] = {}
+        self._overall: Optional[Dict] = None
+        self._event = asyncio.Event()
+
+    def push(self, delta: Dict):
+        """Додавання зміни: для кожного завдання зберігається лише остання"""
+        if delta.get("task_id"):
+            self._tasks[delta["task_id"]] = {
+                key: value for key, value in delta.items() if key not in ("employee_id", "overall_progress")
+            }
+        if delta.get("overall_progress") is not None:
+            self._overall = delta["overall_progress"]
+        self._event.set()
+
+    async def next_update(self, timeout: float) -> Optional[Dict]:
+        """Наступний об'єднаний пакет змін або None якщо за timeout змін не було"""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        # Вікно об'єднання: швидкі серії змін відправляються одним повідомленням
+        await asyncio.sleep(self.coalesce_interval)
+        self._event.clear()
+        update = {
+            "employee_id": self.employee_id,
+            "tasks": list(self._tasks.values()),
+            "overall_progress": self._overall,
+        }
+        self._tasks = {}
+        self._overall = None
+        return update
+
+
+class ProgressHub:
+    """Одне pub/sub з'єднання на воркер, розсилка змін локальним підписникам"""
+
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self.max_connections = int(os.getenv("PROGRESS_STREAM_MAX_CONNECTIONS", "1000"))
+        self.max_per_employee = int(os.getenv("PROGRESS_STREAM_MAX_PER_EMPLOYEE", "20"))
+        self.coalesce_interval = float(os.getenv("PROGRESS_STREAM_COALESCE_SECONDS", "0.5"))
+        self.heartbeat_interval = float(os.getenv("PROGRESS_STREAM_HEARTBEAT_SECONDS", "15"))
+
+        self._subscribers: Dict[str, Set[ProgressSubscription]] = {}
+        self._connections = 0
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+
+    async def _listen(self):
+        """Отримання змін з Redis з перепідключенням при помилках"""
+        while True:
+            client = aioredis.from_url(self.redis_url)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    channel = message["channel"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    employee_id = channel[len(CHANNEL_PREFIX):]
+                    subscribers = self._subscribers.get(employee_id)
+                    if not subscribers:
+                        continue
+                    delta = json.loads(message["data"])
+                    for subscription in subscribers:
+                        subscription.push(delta)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Помилка pub/sub прогресу, перепідключення: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+                await client.close()
+
+    def subscribe(self, employee_id: str) -> ProgressSubscription:
+        """Реєстрація підписника з перевіркою лімітів"""
+        subscribers = self._subscribers.setdefault(employee_id, set())
+        if self._connections >= self.max_connections or len(subscribers) >= self.max_per_employee:
+            if not subscribers:
+                del self._subscribers[employee_id]
+            raise ConnectionLimitError("Перевищено ліміт підписок на прогрес")
+        subscription = ProgressSubscription(employee_id, self.coalesce_interval)
+        subscribers.add(subscription)
+        self._connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: ProgressSubscription):
+        subscribers = self._subscribers.get(subscription.employee_id)
+        if subscribers and subscription in subscribers:
+            subscribers.discard(subscription)
+            self._connections -= 1
+            if not subscribers:
+                del self._subscribers[subscription.employee_id]
@@ -0,0 +1,148 @@
+"""
+OnboardAI Q&A Analytics - Інкрементальні агрегати qa_interactions та читання аналітики з них
+"""
+
+import os
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from metrics import observe_supabase
+
+logger = logging.getLogger(__name__)
+
+# Верхні межі кошиків latency_buckets (мс); останній кошик обмежений latency_max_ms
+LATENCY_BUCKET_BOUNDS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# Максимальний період для кожної гранулярності (дні)
+MAX_DAYS = {"hour": 14, "day": 365}
+
+
+def latency_percentile(buckets: List[int], max_ms: int, percentile: float) -> Optional[int]:
+    """Оцінка перцентиля затримки за гістограмою (верхня межа кошика)"""
+    total = sum(buckets)
+    if not total:
+        return None
+    threshold = total * percentile
+    seen = 0
+    for index, count in enumerate(buckets):
+        seen += count
+        if seen >= threshold:
+            return LATENCY_BUCKET_BOUNDS[index] if index < len(LATENCY_BUCKET_BOUNDS) else max_ms
+    return max_ms
+
+
+def _merge(target: Dict, row: Dict):
+    for field in ("questions", "cache_hits", "vector_answers", "fallback_answers",
+                  "low_confidence", "confidence_sum", "latency_sum_ms"):
+        target[field] = target.get(field, 0) + (row.get(field) or 0)
+    target["latency_max_ms"] = max(target.get("latency_max_ms", 0), row.get("latency_max_ms") or 0)
+    buckets = row.get("latency_buckets") or []
+    merged = target.setdefault("latency_buckets", [0] * (len(LATENCY_BUCKET_BOUNDS) + 1))
+    for index, count in enumerate(buckets[:len(merged)]):
+        merged[index] += count or 0
+
+
+def _summary(totals: Dict) -> Dict:
+    questions = totals.get("questions", 0)
+    return {
+        "questions": questions,
+        "cache_hit_rate": round(totals["cache_hits"] / questions, 4) if questions else None,
+        "fallback_rate": round(totals["fallback_answers"] / questions, 4) if questions else None,
+        "low_confidence": totals.get("low_confidence", 0),
+        "avg_confidence": round(totals["confidence_sum"] / questions, 4) if questions else None,
+        "avg_latency_ms": round(totals["latency_sum_ms"] / questions) if questions else None,
+        "p95_latency_ms": latency_percentile(totals.get("latency_buckets", []), totals.get("latency_max_ms", 0), 0.95),
+        "max_latency_ms": totals.get("latency_max_ms", 0),
+    }
+
+
+class QAAnalytics:
+    """Агрегація нових взаємодій з водяного знаку та аналітика лише з таблиць агрегатів"""
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+        # Параметри агрегації
+        self.batch_size = int(os.getenv("QA_ROLLUP_BATCH_SIZE", "5000"))
+        self.low_confidence = float(os.getenv("QA_LOW_CONFIDENCE_THRESHOLD", "0.5"))
+        self.max_batches = int(os.getenv("QA_ROLLUP_MAX_BATCHES", "50"))
+
+    def _rollup_batch(self) -> int:
+        with observe_supabase("qa_interactions", "rollup"):
+            result = self.supabase.rpc("rollup_qa_interactions", {
+                "p_batch_size": self.batch_size,
+                "p_low_confidence": self.low_confidence,
+            }).execute()
+        return result.data or 0
+
+    async def rollup(self) -> int:
+        """Обробка нових взаємодій батчами, доки не наздоженемо водяний знак"""
+        processed = 0
+        for _ in range(self.max_batches):
+            count = await asyncio.to_thread(self._rollup_batch)
+            processed += count
+            if count < self.batch_size:
+                break
+        if processed:
+            logger.info(f"Q&A аналітика: агреговано {processed} взаємодій")
+        return processed
+
+    def _fetch(self, granularity: str, since: datetime, role: Optional[str], top: int) -> Dict:
+        query = self.supabase.table("qa_analytics_rollups")\
+            .select("*")\
+            .eq("granularity", granularity)\
+            .gte("bucket_start", since.isoformat())
+        if role:
+            query = query.eq("role", role)
+        with observe_supabase("qa_analytics_rollups", "select"):
+            rollups = query.order("bucket_start").execute().data or []
+
+        params = {
+            "p_from": since.date().isoformat(),
+            "p_to": datetime.now(timezone.utc).date().isoformat(),
+            "p_role": role,
+            "p_limit": top,
+        }
+        with observe_supabase("qa_question_rollups", "select"):
+            top_questions = self.supabase.rpc("qa_top_questions", params).execute().data or []
+            low_confidence = self.supabase.rpc(
+                "qa_top_questions", {**params, "p_low_confidence_only": True}
+            ).execute().data or []
+
+        return {"rollups": rollups, "top_questions": top_questions, "low_confidence": low_confidence}
+
+    async def report(self, granularity: str = "hour", days: int = 7, role: Optional[str] = None, top: int = 20) -> Dict:
+        """Підсумки, тренди по ролях, топ питань та питання з низькою впевненістю за період"""
+        days = max(1, min(days, MAX_DAYS[granularity]))
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        if granularity == "day":
+            since = since.replace(hour=0, minute=0, second=0, microsecond=0)
+        else:
+            since = since.replace(minute=0, second=0, microsecond=0)
+
+        data = await asyncio.to_thread(self._fetch, granularity, since, role, top)
+
+        totals: Dict = {}
+        per_role: Dict[str, Dict] = defaultdict(dict)
+        trends: Dict[str, List[Dict]] = defaultdict(list)
+        for row in data["rollups"]:
+            _merge(totals, row)
+            _merge(per_role[row["role"]], row)
+            bucket: Dict = {}
+            _merge(bucket, row)
+            trends[row["role"]].append({"bucket_start": row["bucket_start"], **_summary(bucket)})
+
+        return {
+            "granularity": granularity,
+            "since": since.isoformat(),
+            "role": role,
+            "summary": _summary(totals),
+            "roles": {name: _summary(values) for name, values in per_role.items()},
+            "trends": trends,
+            "top_questions": data["top_questions"],
+            "low_confidence_questions": data["low_confidence"],
+            "buckets_read": len(data["rollups"]),
+        }
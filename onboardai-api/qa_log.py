@@ -0,0 +1,179 @@
+"""
+OnboardAI Q&A Log - Write-behind запис історії питань і відповідей у qa_interactions батчами
+"""
+
+import os
+import uuid
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from metrics import QA_LOG_EVENTS, observe_supabase
+
+logger = logging.getLogger(__name__)
+
+
+class QAInteractionLog:
+    """
+    Буфер у пам'яті воркера з фоновим скиданням в qa_interactions
+
+    record() не робить мережевих викликів; батч записується одним multi-row insert
+    при досягненні batch_size або раз на flush_seconds, залишок - при зупинці.
+    Якщо батч не записався, рядки записуються по одному: рядок з невідомим співробітником
+    зберігається без employee_id, а рядок, що не записався й так, відкидається. Лише коли
+    база недоступна взагалі, батч повертається в буфер (не більше max_attempts разів).
+    """
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+        # Параметри буфера
+        self.batch_size = int(os.getenv("QA_LOG_BATCH_SIZE", "200"))
+        self.flush_seconds = float(os.getenv("QA_LOG_FLUSH_SECONDS", "2.0"))
+        self.max_buffer = int(os.getenv("QA_LOG_MAX_BUFFER", "10000"))
+        self.max_attempts = int(os.getenv("QA_LOG_MAX_ATTEMPTS", "5"))
+
+        self._buffer: deque = deque()
+        self._full = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def record(
+        self,
+        question: str,
+        answer: str,
+        confidence: float,
+        sources: List[str],
+        role: str,
+        answer_source: str,
+        latency_ms: float,
+        employee_id: Optional[str] = None,
+    ):
+        """Додавання взаємодії в буфер (при переповненні найстаріші записи відкидаються)"""
+        if len(self._buffer) >= self.max_buffer:
+            self._buffer.popleft()
+            QA_LOG_EVENTS.labels("dropped").inc()
+        self._buffer.append({
+            "employee_id": _valid_uuid(employee_id),
+            "question": question,
+            "answer": answer,
+            "confidence": min(1.0, max(0.0, float(confidence))),
+            "sources": [str(source) for source in sources],
+            "role": role,
+            "answer_source": answer_source,
+            "latency_ms": max(0, int(latency_ms)),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+        if len(self._buffer) >= self.batch_size:
+            self._full.set()
+
+    def _insert(self, rows: List[Dict]):
+        with observe_supabase("qa_interactions", "insert"):
+            self.supabase.table("qa_interactions").insert(
+                [{key: value for key, value in row.items() if not key.startswith("_")} for row in rows]
+            ).execute()
+
+    def _insert_row(self, row: Dict) -> bool:
+        """Запис одного рядка; співробітник, якого немає в employees, замінюється на NULL"""
+        try:
+            self._insert([row])
+            return True
+        except Exception:
+            if not row.get("employee_id"):
+                return False
+        try:
+            self._insert([{**row, "employee_id": None}])
+            return True
+        except Exception:
+            return False
+
+    def _insert_rows(self, rows: List[Dict]) -> Optional[List[Dict]]:
+        """
+        Порядковий запис батчу після помилки multi-row insert; повертає рядки, що не записались
+
+        None - не записався навіть перший рядок (база недоступна, батч варто повторити цілим).
+        """
+        if not self._insert_row(rows[0]):
+            return None
+        return [row for row in rows[1:] if not self._insert_row(row)]
+
+    def _requeue(self, batch: List[Dict]):
+        """Повернення батчу в початок буфера (база недоступна) з обліком спроб"""
+        retry = []
+        for row in batch:
+            row["_attempts"] = row.get("_attempts", 0) + 1
+            if row["_attempts"] < self.max_attempts:
+                retry.append(row)
+        room = max(0, self.max_buffer - len(self._buffer))
+        dropped = len(batch) - min(len(retry), room)
+        if dropped:
+            QA_LOG_EVENTS.labels("dropped").inc(dropped)
+        self._buffer.extendleft(reversed(retry[:room]))
+
+    async def flush(self) -> int:
+        """Запис одного батчу; повертає кількість рядків, узятих з буфера (0 - батч повернуто)"""
+        batch = []
+        while self._buffer and len(batch) < self.batch_size:
+            batch.append(self._buffer.popleft())
+        if not batch:
+            return 0
+        try:
+            await asyncio.to_thread(self._insert, batch)
+        except Exception as e:
+            logger.warning(f"Батч з {len(batch)} Q&A взаємодій не записано, запис по одному: {e}")
+            failed = await asyncio.to_thread(self._insert_rows, batch)
+            if failed is None:
+                logger.error(f"Q&A історія: база недоступна, {len(batch)} записів повернуто в буфер")
+                self._requeue(batch)
+                return 0
+            if failed:
+                logger.error(f"Q&A історія: відкинуто {len(failed)} записів, які неможливо зберегти")
+                QA_LOG_EVENTS.labels("dropped").inc(len(failed))
+            QA_LOG_EVENTS.labels("flushed").inc(len(batch) - len(failed))
+            return len(batch)
+        QA_LOG_EVENTS.labels("flushed").inc(len(batch))
+        return len(batch)
+
+    async def run(self):
+        """Фоновий воркер: скидання по розміру батчу або по часу (до сигналу зупинки)"""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            try:
+                while await self.flush() == self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Помилка воркера Q&A історії: {e}")
+
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Зупинка воркера після поточного батчу (без скасування запису в потоці) та скидання залишку"""
+        if self._worker:
+            self._stopping = True
+            self._full.set()
+            await self._worker
+            self._worker = None
+        while self._buffer:
+            if not await self.flush():
+                logger.error(f"Q&A історія: {len(self._buffer)} записів не збережено при зупинці")
+                break
+
+
+def _valid_uuid(value: Optional[str]) -> Optional[str]:
+    """employee_id з параметра запиту - лише коректний UUID (колонка UUID REFERENCES employees)"""
+    if not value:
+        return None
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
@@ -0,0 +1,203 @@
+"""
+OnboardAI Rate Limiter - Спільний для всіх процесів token bucket для OpenAI (запити + токени, пріоритети)
+"""
+
+import os
+import re
+import time
+import random
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from metrics import OPENAI_LIMITER_WAIT, OPENAI_RATE_LIMITED
+from resilience import BudgetExhaustedError, remaining_budget
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+KEY_PREFIX = "openai_rl:"
+
+# Квоти за замовчуванням (запитів/хв, токенів/хв); перевизначаються OPENAI_RPM_<MODEL>/OPENAI_TPM_<MODEL>
+DEFAULT_LIMITS = {
+    "text-embedding-3-large": (3000, 1000000),
+    "text-embedding-3-small": (3000, 1000000),
+    "gpt-3.5-turbo": (3500, 160000),
+}
+FALLBACK_LIMITS = (500, 60000)
+
+# Атомарне поповнення та списання двох bucket-ів (запити і токени) моделі.
+# bulk не може опустити bucket нижче резерву і поступається, поки чекають interactive виклики.
+# Повертає {1, 0} якщо дозвіл отримано, або {0, мс очікування}.
+ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local rpm = tonumber(ARGV[2])
+local tpm = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local interactive = ARGV[5] == 'interactive'
+local reserve = tonumber(ARGV[6])
+local waiting_ttl = tonumber(ARGV[7])
+
+local cooldown = redis.call('PTTL', KEYS[3])
+if cooldown > 0 then
+  return {0, cooldown}
+end
+
+local state = redis.call('HMGET', KEYS[1], 'req', 'tok', 'ts')
+local req = tonumber(state[1]) or rpm
+local tok = tonumber(state[2]) or tpm
+local ts = tonumber(state[3]) or now
+local elapsed = math.max(0, now - ts)
+req = math.min(rpm, req + elapsed * rpm / 60000)
+tok = math.min(tpm, tok + elapsed * tpm / 60000)
+
+local floor_req = 0
+local floor_tok = 0
+local wait = 0
+if not interactive then
+  local waiting = redis.call('PTTL', KEYS[2])
+  if waiting > 0 then
+    wait = waiting
+  end
+  floor_req = rpm * reserve
+  floor_tok = tpm * reserve
+end
+if req - 1 < floor_req then
+  wait = math.max(wait, (floor_req + 1 - req) * 60000 / rpm)
+end
+if tok - cost < floor_tok then
+  wait = math.max(wait, (floor_tok + cost - tok) * 60000 / tpm)
+end
+
+if wait > 0 then
+  if interactive then
+    redis.call('SET', KEYS[2], '1', 'PX', waiting_ttl)
+  end
+  redis.call('HSET', KEYS[1], 'req', req, 'tok', tok, 'ts', now)
+  redis.call('PEXPIRE', KEYS[1], 120000)
+  return {0, math.ceil(wait)}
+end
+
+redis.call('HSET', KEYS[1], 'req', req - 1, 'tok', tok - cost, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], 120000)
+return {1, 0}
+"""
+
+
+def _model_env_key(model: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "_", model.upper())
+
+
+def estimate_tokens(text: str) -> int:
+    """Груба оцінка токенів (~4 символи на токен) до виклику; уточнюється після по usage"""
+    return max(1, len(text) // 4)
+
+
+class OpenAIRateLimiter:
+    """Token bucket у Redis, спільний для воркерів uvicorn та задачі векторизації"""
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.enabled = os.getenv("OPENAI_RATE_LIMIT_ENABLED", "true").lower() == "true"
+        # Частка квоти, яку bulk трафік не може використати (запас для interactive)
+        self.bulk_reserve = float(os.getenv("OPENAI_BULK_RESERVE_RATIO", "0.2"))
+        self.max_wait = float(os.getenv("OPENAI_LIMITER_MAX_WAIT_SECONDS", "120"))
+        self.waiting_ttl_ms = int(os.getenv("OPENAI_INTERACTIVE_WAITING_TTL_MS", "2000"))
+
+        self._acquire = redis_client.register_script(ACQUIRE_SCRIPT)
+        self._limits: Dict[str, tuple] = {}
+
+    def limits(self, model: str) -> tuple:
+        if model not in self._limits:
+            rpm, tpm = DEFAULT_LIMITS.get(model, FALLBACK_LIMITS)
+            key = _model_env_key(model)
+            self._limits[model] = (
+                int(os.getenv(f"OPENAI_RPM_{key}", rpm)),
+                int(os.getenv(f"OPENAI_TPM_{key}", tpm)),
+            )
+        return self._limits[model]
+
+    def _keys(self, model: str):
+        return [
+            f"{KEY_PREFIX}{model}",
+            f"{KEY_PREFIX}{model}:interactive_waiting",
+            f"{KEY_PREFIX}{model}:cooldown",
+        ]
+
+    async def acquire(self, model: str, tokens: int, priority: str = INTERACTIVE) -> int:
+        """
+        Очікування дозволу на виклик моделі; повертає фактично списану кількість токенів
+
+        Очікування обмежене бюджетом запиту (BudgetExhaustedError) або max_wait для фонових задач.
+        Якщо Redis недоступний, виклик пропускається без обмеження.
+        """
+        if not self.enabled:
+            return 0
+
+        rpm, tpm = self.limits(model)
+        # Запит більший за доступну частину bucket-а інакше ніколи не отримав би дозвіл
+        ceiling = tpm if priority == INTERACTIVE else int(tpm * (1 - self.bulk_reserve))
+        cost = min(max(1, tokens), ceiling)
+
+        start = time.monotonic()
+        try:
+            while True:
+                try:
+                    allowed, wait_ms = self._acquire(
+                        keys=self._keys(model),
+                        args=[
+                            int(time.time() * 1000), rpm, tpm, cost,
+                            priority, self.bulk_reserve, self.waiting_ttl_ms,
+                        ],
+                    )
+                except Exception as e:
+                    logger.warning(f"Rate limiter OpenAI недоступний, виклик без обмеження: {e}")
+                    return 0
+                if allowed:
+                    return cost
+
+                wait = int(wait_ms) / 1000
+                # interactive перевіряє частіше, bulk - з jitter, щоб процеси не прокидались разом
+                wait = min(wait, 0.25) if priority == INTERACTIVE else wait * random.uniform(1.0, 1.5)
+                waited = time.monotonic() - start
+                budget = remaining_budget()
+                if budget is not None and wait >= budget:
+                    raise BudgetExhaustedError(f"Бюджет запиту вичерпано в очікуванні квоти {model}")
+                if budget is None and waited + wait > self.max_wait:
+                    raise BudgetExhaustedError(f"Перевищено час очікування квоти {model}")
+                await asyncio.sleep(wait)
+        finally:
+            OPENAI_LIMITER_WAIT.labels(model, priority).observe(time.monotonic() - start)
+
+    def settle(self, model: str, reserved: int, actual: Optional[int]):
+        """Корекція bucket-а токенів на різницю між оцінкою та фактичним usage"""
+        if not self.enabled or not reserved or actual is None or actual == reserved:
+            return
+        try:
+            self.redis_client.hincrbyfloat(f"{KEY_PREFIX}{model}", "tok", reserved - actual)
+        except Exception as e:
+            logger.warning(f"Не вдалося скоригувати rate limiter OpenAI: {e}")
+
+    def rate_limited(self, model: str, retry_after: Optional[float] = None):
+        """Відповідь 429: призупинення викликів моделі для всіх процесів"""
+        OPENAI_RATE_LIMITED.labels(model).inc()
+        if not self.enabled:
+            return
+        pause = retry_after if retry_after and retry_after > 0 else 1.0
+        try:
+            self.redis_client.set(self._keys(model)[2], "1", px=int(pause * 1000))
+        except Exception as e:
+            logger.warning(f"Не вдалося записати паузу rate limiter-а OpenAI: {e}")
+
+
+def retry_after_seconds(error) -> Optional[float]:
+    """Retry-After з відповіді OpenAI (якщо є)"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,242 @@
+"""
+OnboardAI Resilience - Circuit breakers та бюджети часу для OpenAI, векторного індексу та MCP серверів
+"""
+
+import os
+import time
+import asyncio
+import logging
+import contextvars
+from collections import deque
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Coroutine, Dict, Optional, Set, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+# Загальний бюджет часу запиту (секунди) та дедлайн поточного запиту
+REQUEST_BUDGET_SECONDS = float(os.getenv("REQUEST_BUDGET_SECONDS", "15.0"))
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class CircuitOpenError(Exception):
+    """Залежність вимкнена circuit breaker-ом - потрібно одразу переходити на fallback"""
+
+
+class BudgetExhaustedError(asyncio.TimeoutError):
+    """Бюджет часу запиту вичерпано"""
+
+
+def start_request_budget(budget: float = REQUEST_BUDGET_SECONDS):
+    """Встановлення дедлайну для поточного запиту (викликається в middleware)"""
+    return _deadline.set(time.monotonic() + budget)
+
+
+def reset_request_budget(token):
+    _deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Залишок бюджету поточного запиту або None поза запитом (фонові задачі)"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def run_in_background(coro: Coroutine) -> asyncio.Task:
+    """
+    Запуск фонової задачі з хендлера без дедлайну запиту
+
+    create_task копіює контекст, тож задача успадкувала б майже вичерпаний бюджет запиту;
+    у чистому контексті діють лише таймаути залежностей або власний бюджет задачі.
+    """
+    task = asyncio.create_task(coro, context=contextvars.Context())
+    # Цикл подій тримає лише слабкі посилання на задачі - без цього задачу може зібрати GC
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def cancel_background_tasks():
+    """Скасування фонових задач при зупинці воркера з очікуванням їх завершення"""
+    tasks = list(_background_tasks)
+    for task in tasks:
+        task.cancel()
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.error(f"Фонова задача завершилась з помилкою: {result}")
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker з ковзним вікном помилок та повільних викликів
+
+    closed -> open, коли частка помилок/повільних викликів у вікні перевищує поріг;
+    open -> half_open після open_seconds; один пробний виклик закриває або знову відкриває.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        window_seconds: float = 30.0,
+        min_calls: int = 10,
+        failure_ratio: float = 0.5,
+        slow_call_seconds: Optional[float] = None,
+        open_seconds: float = 30.0,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds or timeout * 0.8
+        self.open_seconds = open_seconds
+
+        self.state = "closed"
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._calls: deque = deque()  # (timestamp, failed_or_slow)
+
+    def _trim(self, now: float):
+        while self._calls and self._calls[0][0] < now - self.window_seconds:
+            self._calls.popleft()
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self._opened_at < self.open_seconds:
+                return False
+            self.state = "half_open"
+            self._probe_in_flight = False
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def available(self) -> bool:
+        """Чи прийме breaker виклик (без резервування пробного виклику half_open)"""
+        if self.state == "open":
+            return time.monotonic() - self._opened_at >= self.open_seconds
+        return not (self.state == "half_open" and self._probe_in_flight)
+
+    def record(self, success: bool, duration: float):
+        now = time.monotonic()
+        bad = not success or duration >= self.slow_call_seconds
+
+        if self.state == "half_open":
+            self._probe_in_flight = False
+            if bad:
+                self._open(now)
+            else:
+                self.state = "closed"
+                self._calls.clear()
+            return
+
+        self._calls.append((now, bad))
+        self._trim(now)
+        if len(self._calls) >= self.min_calls:
+            failures = sum(1 for _, failed in self._calls if failed)
+            if failures / len(self._calls) >= self.failure_ratio:
+                self._open(now)
+
+    def _open(self, now: float):
+        if self.state != "open":
+            logger.warning(f"Circuit breaker '{self.name}' відкрито")
+        self.state = "open"
+        self._opened_at = now
+        self._calls.clear()
+
+    def snapshot(self) -> Dict:
+        self._trim(time.monotonic())
+        failures = sum(1 for _, failed in self._calls if failed)
+        return {
+            "state": self.state,
+            "window_calls": len(self._calls),
+            "window_failures": failures,
+            "timeout_seconds": self.timeout,
+        }
+
+    async def call(
+        self,
+        operation: Callable[[], Awaitable],
+        timeout: Optional[float] = None,
+        ignore: Tuple[Type[Exception], ...] = (),
+    ):
+        """
+        Виклик залежності з breaker-ом та дедлайном
+
+        Таймаут - мінімум з таймауту залежності та залишку бюджету запиту. Помилкою залежності
+        рахується лише її власний таймаут; якщо виклик обірвав залишок бюджету запиту,
+        піднімається BudgetExhaustedError без запису в вікно breaker-а. Помилки з `ignore`
+        (наприклад, 429 від OpenAI) означають відмову квоти, а не збій, і теж не записуються.
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Залежність '{self.name}' тимчасово недоступна")
+
+        deadline = timeout or self.timeout
+        budget_limited = False
+        budget = remaining_budget()
+        if budget is not None:
+            if budget <= 0:
+                self._release_probe()
+                raise BudgetExhaustedError(f"Бюджет запиту вичерпано перед викликом '{self.name}'")
+            if budget < deadline:
+                deadline = budget
+                budget_limited = True
+
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(operation(), timeout=deadline)
+        except asyncio.CancelledError:
+            # Скасування ззовні (таймаут кроку) не є помилкою залежності
+            self._release_probe()
+            raise
+        except asyncio.TimeoutError:
+            if budget_limited:
+                self._release_probe()
+                raise BudgetExhaustedError(f"Бюджет запиту вичерпано під час виклику '{self.name}'")
+            self.record(False, time.monotonic() - start)
+            raise
+        except ignore:
+            self._release_probe()
+            raise
+        except Exception:
+            self.record(False, time.monotonic() - start)
+            raise
+        self.record(True, time.monotonic() - start)
+        return result
+
+    def _release_probe(self):
+        """Пробний виклик half_open, що не дав результату, не відкриває і не закриває breaker"""
+        if self.state == "half_open":
+            self._probe_in_flight = False
+
+
+def _breaker(name: str, default_timeout: str) -> CircuitBreaker:
+    prefix = f"BREAKER_{name.upper()}"
+    return CircuitBreaker(
+        name,
+        timeout=float(os.getenv(f"{prefix}_TIMEOUT", default_timeout)),
+        window_seconds=float(os.getenv("BREAKER_WINDOW_SECONDS", "30")),
+        min_calls=int(os.getenv("BREAKER_MIN_CALLS", "10")),
+        failure_ratio=float(os.getenv("BREAKER_FAILURE_RATIO", "0.5")),
+        open_seconds=float(os.getenv("BREAKER_OPEN_SECONDS", "30")),
+    )
+
+
+# Breaker-и залежностей (по одному на процес)
+breakers: Dict[str, CircuitBreaker] = {
+    "openai_embeddings": _breaker("openai_embeddings", "10.0"),
+    "openai_chat": _breaker("openai_chat", "30.0"),
+    "vector_index": _breaker("vector_index", "5.0"),
+    "mcp_notion": _breaker("mcp_notion", "5.0"),
+    "mcp_jira": _breaker("mcp_jira", "10.0"),
+}
+
+
+def breaker_states() -> Dict[str, Dict]:
+    """Стан всіх breaker-ів для /health"""
+    return {name: breaker.snapshot() for name, breaker in breakers.items()}
@@ -0,0 +1,100 @@
+"""
+OnboardAI Startup Benchmark - Час старту API з розбивкою вартості імпорту по модулях
+
+Використання:
+    python startup_benchmark.py                       # імпорт main (те, що чекає воркер до /health)
+    python startup_benchmark.py --warm-up             # + фоновий прогрів VectorService
+    python startup_benchmark.py --module vector_service --top 30
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WARM_UP_SNIPPET = """
+import vector_service
+vector_service.VectorService().warm_up()
+"""
+
+
+def run_importtime(code: str) -> Tuple[float, str]:
+    """Запуск коду в чистому інтерпретаторі з -X importtime; повертає (секунди, stderr)"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=API_DIR,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        # Остання помилка (наприклад, відсутня залежність) - корисніша за весь лог importtime
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError("\n".join(errors[-5:]))
+    return elapsed, result.stderr
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, float]]:
+    """Власний час імпорту (мс) по пакетах верхнього рівня та кумулятивний час кожного пакета"""
+    packages: Dict[str, Dict[str, float]] = defaultdict(lambda: {"self_ms": 0.0, "cumulative_ms": 0.0, "modules": 0})
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:       123 |        456 |     package.module"
+        try:
+            self_us, cumulative_us, module = line.split(":", 1)[1].split("|")
+            self_us, cumulative_us, module = int(self_us), int(cumulative_us), module.strip()
+        except ValueError:
+            continue
+        package = packages[module.split(".")[0]]
+        package["self_ms"] += self_us / 1000
+        package["modules"] += 1
+        if "." not in module:
+            package["cumulative_ms"] = max(package["cumulative_ms"], cumulative_us / 1000)
+    return packages
+
+
+def print_report(title: str, elapsed: float, packages: Dict[str, Dict[str, float]], top: int):
+    total_ms = sum(package["self_ms"] for package in packages.values())
+    ranked: List[Tuple[str, Dict[str, float]]] = sorted(
+        packages.items(), key=lambda item: item[1]["self_ms"], reverse=True
+    )
+
+    print(f"\n{title}")
+    print(f"  Час процесу: {elapsed * 1000:.0f} мс, сумарний імпорт: {total_ms:.0f} мс, модулів: {sum(p['modules'] for p in packages.values()):.0f}")
+    print(f"  {'пакет':<32}{'власний, мс':>14}{'кумулятивний, мс':>18}{'частка':>10}{'модулів':>10}")
+    for name, package in ranked[:top]:
+        share = package["self_ms"] / total_ms * 100 if total_ms else 0
+        print(
+            f"  {name:<32}{package['self_ms']:>14.1f}{package['cumulative_ms']:>18.1f}"
+            f"{share:>9.1f}%{package['modules']:>10.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк часу старту OnboardAI API")
+    parser.add_argument("--module", default="main", help="Модуль для імпорту (за замовчуванням main)")
+    parser.add_argument("--top", type=int, default=20, help="Кількість пакетів у звіті")
+    parser.add_argument("--warm-up", action="store_true", help="Також виміряти прогрів VectorService")
+    args = parser.parse_args()
+
+    try:
+        elapsed, stderr = run_importtime(f"import {args.module}")
+        print_report(f"Імпорт {args.module}", elapsed, parse_importtime(stderr), args.top)
+
+        if args.warm_up:
+            elapsed, stderr = run_importtime(WARM_UP_SNIPPET)
+            print_report("Прогрів VectorService (фоновий, після готовності /health)", elapsed, parse_importtime(stderr), args.top)
+    except RuntimeError as e:
+        print(f"❌ Помилка запуску: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
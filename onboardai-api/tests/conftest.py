@@ -0,0 +1,18 @@
+"""
+Спільні фікстури unit-тестів OnboardAI API (запуск: cd onboardai-api && python -m pytest tests)
+"""
+
+import os
+import sys
+
+import fakeredis
+import pytest
+
+# Модулі API імпортуються як у контейнері - з кореня onboardai-api
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def redis_client():
+    """Redis у пам'яті (з підтримкою Lua скриптів)"""
+    return fakeredis.FakeRedis()
@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime, timezone
+
+from connectors import JiraConnector, _adf_text, parse_marker
+
+
+def test_parse_marker_formats():
+    expected = datetime(2024, 1, 15, 10, 30, tzinfo=timezone.utc)
+    assert parse_marker("2024-01-15T10:30:00.000+0000") == expected
+    assert parse_marker("2024-01-15T12:30:00+02:00") == expected
+    assert parse_marker("2024-01-15T10:30:00Z") == expected
+    assert parse_marker("2024-01-15T10:30:00") == expected
+    assert parse_marker(None) is None and parse_marker("recently") is None
+
+
+def test_adf_text_flattens_document():
+    description = {
+        "type": "doc",
+        "content": [
+            {"type": "paragraph", "content": [{"type": "text", "text": "Налаштувати "}, {"type": "text", "text": "VPN"}]},
+            {"type": "bulletList", "content": [
+                {"type": "listItem", "content": [{"type": "paragraph", "content": [{"type": "text", "text": "ключ"}]}]},
+            ]},
+        ],
+    }
+    assert _adf_text(description) == "Налаштувати VPN\nключ\n\n"
+    assert _adf_text("plain") == "plain" and _adf_text(None) == ""
+
+
+def test_jira_pages_follow_start_at_until_total():
+    requests = []
+
+    class Connector(JiraConnector):
+        async def _get(self, path, params):
+            requests.append(params["startAt"])
+            issues = [
+                {"key": f"ONBD-{params['startAt'] + i}", "fields": {"summary": "s", "updated": "2024-01-15T10:30:00.000+0000"}}
+                for i in range(min(params["maxResults"], 5 - params["startAt"]))
+            ]
+            return {"issues": issues, "total": 5}
+
+    connector = Connector(lambda: None, 0, 2, ["ONBD"])
+
+    async def collect():
+        return [page async for page in connector.pages(None)]
+
+    pages = asyncio.run(collect())
+    assert requests == [0, 2, 4]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert pages[0][0]["id"] == "jira:ONBD-0"
+    assert pages[0][0]["content"].startswith("Задача Jira ONBD-0: s")
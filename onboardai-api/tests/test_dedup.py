@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+
+from dedup import MinHasher, deduplicate_chunks, normalize_for_sketch
+
+TEMPLATE = (
+    "Завдання онбордингу для нового співробітника {name}: налаштувати робоче місце, "
+    "отримати доступи до репозиторіїв, пройти вступний курс безпеки та зустрітися з ментором. "
+    "Деталі: https://wiki.example.com/onboarding/{slug} до {date}."
+)
+
+
+def chunk(index, name, content=None):
+    return {
+        "id": f"chunk-{index}",
+        "content": content or TEMPLATE.format(name=name, slug=name.lower(), date=f"2024-01-{index + 10}"),
+        "metadata": {"table": "knowledge_base", "id": str(index), "name": name},
+    }
+
+
+def test_normalize_masks_variable_values():
+    tokens = normalize_for_sketch("Deploy v2 at 2024-01-15 via https://ci.example.com/run/42")
+    assert "<url>" in tokens and "<num>" in tokens
+    assert "42" not in tokens and "2024" not in tokens
+
+
+def test_signature_is_deterministic_and_similarity_tracks_overlap():
+    hasher = MinHasher()
+    a = hasher.signature(TEMPLATE.format(name="Anna", slug="anna", date="2024-01-01"))
+    b = hasher.signature(TEMPLATE.format(name="Petro", slug="petro", date="2024-02-02"))
+    c = hasher.signature("Зовсім інший текст про відпустки, лікарняні та компенсацію витрат на навчання.")
+
+    assert np.array_equal(a, MinHasher().signature(TEMPLATE.format(name="Anna", slug="anna", date="2024-01-01")))
+    assert (a == b).mean() > 0.7
+    assert (a == c).mean() < 0.2
+    assert len(hasher.band_keys(a)) == hasher.bands
+
+
+def test_near_duplicates_collapse_into_one_vector_with_sources():
+    chunks = [chunk(0, "Anna"), chunk(1, "Petro"), chunk(2, "Olha", "Політика відпусток: 24 робочі дні на рік.")]
+    result = deduplicate_chunks(chunks, threshold=0.7)
+
+    assert len(result) == 2
+    template = result[0]["metadata"]
+    assert template["duplicate_count"] == 2
+    assert template["source_ids"] == ["knowledge_base:0", "knowledge_base:1"]
+    assert template["source_names"] == ["Anna", "Petro"]
+    assert result[1]["metadata"]["duplicate_count"] == 1
+    # Вхідні chunks не змінюються
+    assert "source_ids" not in chunks[0]["metadata"]
+
+
+def test_sources_are_capped_by_count():
+    result = deduplicate_chunks([chunk(i, "Anna") for i in range(10)], threshold=0.7, max_sources=3)
+
+    assert len(result) == 1
+    metadata = result[0]["metadata"]
+    assert metadata["duplicate_count"] == 10
+    assert len(metadata["source_ids"]) == len(metadata["source_names"]) == 3
+
+
+def test_sources_are_capped_by_serialized_metadata_size():
+    limit = 2048
+    chunks = [chunk(i, "Співробітник з дуже довгим ім'ям " * 3) for i in range(200)]
+    result = deduplicate_chunks(chunks, threshold=0.7, max_sources=1000, max_metadata_bytes=limit)
+
+    representative = result[0]
+    metadata = {**representative["metadata"], "content": representative["content"]}
+    assert len(json.dumps(metadata, ensure_ascii=False).encode()) <= limit
+    assert 1 < len(metadata["source_ids"]) < 200
+    assert metadata["duplicate_count"] == 200
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from vector_service import ACTIVE_INDEX_KEY, VectorService
+
+
+@pytest.fixture
+def service(redis_client, monkeypatch):
+    monkeypatch.setenv("PINECONE_INDEX_NAME", "onboardai-knowledge")
+    monkeypatch.setenv("EMBEDDING_MODEL", "text-embedding-3-large")
+    service = VectorService()
+    service.redis_client = redis_client
+    return service
+
+
+def test_refresh_active_index_applies_alias(service, redis_client):
+    service.index = object()
+    redis_client.set(ACTIVE_INDEX_KEY, json.dumps({
+        "index": "onboardai-knowledge-v2",
+        "model": "text-embedding-3-small",
+        "dimension": 1536,
+    }))
+
+    assert service.refresh_active_index(force=True) is None
+    assert service.pinecone_index_name == "onboardai-knowledge-v2"
+    assert service.embedding_model == "text-embedding-3-small"
+    assert service.embedding_dimension == 1536
+    # Клієнт старого індексу скидається - наступний запит відкриє новий
+    assert service.index is None
+
+
+def test_refresh_active_index_without_alias_keeps_env(service):
+    service.refresh_active_index(force=True)
+    assert service.pinecone_index_name == "onboardai-knowledge"
+    assert service.embedding_dimension == 3072
+
+
+def test_refresh_active_index_throttled(service, redis_client):
+    service.refresh_active_index(force=True)
+    redis_client.set(ACTIVE_INDEX_KEY, json.dumps({"index": "other", "model": "m", "dimension": 8}))
+    service.refresh_active_index()
+    assert service.pinecone_index_name == "onboardai-knowledge"
+    service.refresh_active_index(force=True)
+    assert service.pinecone_index_name == "other"
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import resilience
+from jira_outbox import DEAD_KEY, PENDING_KEY, PROCESSING_KEY, RETRY_KEY, JiraOutbox
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+class FakeJiraClient:
+    """MCP Jira, що відповідає успіхом для ключів з succeed або піднімає помилку"""
+
+    def __init__(self, succeed=None, error=None):
+        self.succeed = succeed
+        self.error = error
+        self.payloads = []
+
+    async def post(self, path, json):
+        self.payloads.append(json)
+        if self.error:
+            raise self.error
+        return FakeResponse({"results": [
+            {"idempotency_key": item["idempotency_key"], "success": self.succeed is None or item["employee_id"] in self.succeed}
+            for item in json["items"]
+        ]})
+
+
+@pytest.fixture(autouse=True)
+def jira_breaker(monkeypatch):
+    breaker = resilience.CircuitBreaker("mcp_jira", timeout=5.0)
+    monkeypatch.setitem(resilience.breakers, "mcp_jira", breaker)
+    return breaker
+
+
+def make_outbox(redis_client, client, **settings):
+    outbox = JiraOutbox(redis_client, lambda: client)
+    outbox.base_backoff = 0.0
+    for name, value in settings.items():
+        setattr(outbox, name, value)
+    return outbox
+
+
+def test_enqueue_is_idempotent(redis_client):
+    outbox = make_outbox(redis_client, FakeJiraClient())
+    assert outbox.enqueue_many([
+        {"employee_id": "e1", "role": "Frontend Developer"},
+        {"employee_id": "e2", "role": "Frontend Developer"},
+        {"employee_id": "e1", "role": "Frontend Developer"},
+    ]) == 2
+    assert outbox.enqueue("e1", "Frontend Developer") is False
+    assert redis_client.llen(PENDING_KEY) == 2
+
+
+def test_drain_success_clears_processing(redis_client):
+    client = FakeJiraClient()
+    outbox = make_outbox(redis_client, client)
+    outbox.enqueue_many([{"employee_id": "e1", "role": "QA"}, {"employee_id": "e2", "role": "QA"}])
+
+    assert asyncio.run(outbox.drain_once()) == 2
+    assert len(client.payloads[0]["items"]) == 2
+    assert outbox.stats() == {"pending": 0, "retry": 0, "processing": 0, "dead_letter": 0}
+
+
+def test_failed_item_goes_to_retry_then_back_to_pending(redis_client):
+    outbox = make_outbox(redis_client, FakeJiraClient(succeed={"e1"}))
+    outbox.enqueue_many([{"employee_id": "e1", "role": "QA"}, {"employee_id": "e2", "role": "QA"}])
+
+    assert asyncio.run(outbox.drain_once()) == 1
+    assert outbox.stats() == {"pending": 0, "retry": 1, "processing": 0, "dead_letter": 0}
+    entry = json.loads(redis_client.zrange(RETRY_KEY, 0, -1)[0])
+    assert entry["employee_id"] == "e2" and entry["attempts"] == 1
+
+    # Повтор з нульовим backoff переноситься в pending на наступній ітерації
+    outbox.jira_client_factory = lambda: FakeJiraClient()
+    assert asyncio.run(outbox.drain_once()) == 1
+    assert outbox.stats()["retry"] == 0
+
+
+def test_dead_letter_after_max_attempts_and_requeue(redis_client):
+    outbox = make_outbox(redis_client, FakeJiraClient(error=RuntimeError("boom")), max_attempts=2)
+    outbox.enqueue("e1", "QA")
+
+    asyncio.run(outbox.drain_once())
+    asyncio.run(outbox.drain_once())
+    assert outbox.stats() == {"pending": 0, "retry": 0, "processing": 0, "dead_letter": 1}
+    assert "boom" in json.loads(redis_client.lindex(DEAD_KEY, 0))["last_error"]
+
+    assert outbox.requeue_dead() == 1
+    assert json.loads(redis_client.lindex(PENDING_KEY, 0))["attempts"] == 0
+
+
+def test_fail_after_lease_recovery_does_not_duplicate(redis_client):
+    outbox = make_outbox(redis_client, FakeJiraClient(), lease_seconds=0.0)
+    outbox.enqueue("e1", "QA")
+    entry = json.loads(outbox._claim(
+        keys=[PENDING_KEY, PROCESSING_KEY, f"{PROCESSING_KEY}:leases"], args=[10, time.time() - 1]
+    )[0])
+
+    outbox._recover_expired_leases()
+    assert outbox.stats() == {"pending": 1, "retry": 0, "processing": 0, "dead_letter": 0}
+
+    # Запізніла помилка воркера, що втратив оренду, не створює другу копію
+    outbox._fail(entry, "timeout")
+    assert outbox.stats() == {"pending": 1, "retry": 0, "processing": 0, "dead_letter": 0}
+
+
+def test_open_breaker_keeps_items_pending(redis_client, jira_breaker):
+    outbox = make_outbox(redis_client, FakeJiraClient())
+    outbox.enqueue("e1", "QA")
+    jira_breaker._open(time.monotonic())
+
+    assert asyncio.run(outbox.drain_once()) == 0
+    assert outbox.stats()["pending"] == 1
@@ -0,0 +1,33 @@
+from vector_service import mmr_select
+
+QUERY = [1.0, 0.0, 0.0]
+# Два майже однакові релевантні кандидати, один менш релевантний, але інший за змістом
+CANDIDATES = [
+    [0.95, 0.30, 0.0],
+    [0.94, 0.31, 0.0],
+    [0.70, -0.10, 0.70],
+    [0.0, 1.0, 0.0],
+]
+
+
+def test_pure_relevance_orders_by_similarity():
+    assert mmr_select(QUERY, CANDIDATES, 3, mmr_lambda=1.0) == [0, 1, 2]
+
+
+def test_diversity_skips_near_duplicate():
+    assert mmr_select(QUERY, CANDIDATES, 2, mmr_lambda=0.5) == [0, 2]
+
+
+def test_selection_has_no_repeats_and_is_bounded():
+    selected = mmr_select(QUERY, CANDIDATES, 10, mmr_lambda=0.3)
+    assert sorted(selected) == [0, 1, 2, 3]
+
+
+def test_empty_inputs():
+    assert mmr_select(QUERY, [], 3, 0.5) == []
+    assert mmr_select(QUERY, CANDIDATES, 0, 0.5) == []
+
+
+def test_unnormalized_vectors_give_same_selection():
+    scaled = [[value * 10 for value in vector] for vector in CANDIDATES]
+    assert mmr_select([5.0, 0.0, 0.0], scaled, 2, 0.5) == mmr_select(QUERY, CANDIDATES, 2, 0.5)
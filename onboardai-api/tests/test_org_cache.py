@@ -0,0 +1,115 @@
+import asyncio
+
+from org_cache import OrganizationCache
+
+
+class FakeQuery:
+    def __init__(self, rows, calls):
+        self._rows = rows
+        self._calls = calls
+        self._domain = None
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        self._domain = value
+        return self
+
+    def limit(self, count):
+        return self
+
+    def execute(self):
+        self._calls.append(self._domain)
+        return type("Result", (), {"data": [dict(row) for row in self._rows if row["domain"] == self._domain]})()
+
+
+class FakeChangesQuery:
+    def __init__(self, changes):
+        self._changes = changes
+        self._after_id = 0
+
+    def select(self, *args):
+        return self
+
+    def gt(self, column, value):
+        self._after_id = value
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, count):
+        return self
+
+    def execute(self):
+        return type("Result", (), {"data": [dict(row) for row in self._changes if row["id"] > self._after_id]})()
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.changes = []
+        self.calls = []
+
+    def table(self, name):
+        if name == "organization_changes":
+            return FakeChangesQuery(self.changes)
+        return FakeQuery(self.rows, self.calls)
+
+
+def make_cache(supabase, redis_client):
+    cache = OrganizationCache(supabase, redis_client)
+    cache.generation_check_seconds = 0.0
+    return cache
+
+
+def test_resolve_uses_local_then_redis(redis_client):
+    supabase = FakeSupabase([{"id": 1, "domain": "acme.com", "name": "Acme"}])
+    first = make_cache(supabase, redis_client)
+    second = make_cache(supabase, redis_client)
+
+    assert asyncio.run(first.resolve("acme.com"))["name"] == "Acme"
+    assert asyncio.run(first.resolve("acme.com"))["name"] == "Acme"
+    assert asyncio.run(second.resolve("acme.com"))["name"] == "Acme"
+    assert supabase.calls == ["acme.com"]
+
+
+def test_unknown_domain_is_cached_negatively(redis_client):
+    supabase = FakeSupabase([])
+    cache = make_cache(supabase, redis_client)
+
+    assert asyncio.run(cache.resolve("nobody.com")) is None
+    assert asyncio.run(make_cache(supabase, redis_client).resolve("nobody.com")) is None
+    assert supabase.calls == ["nobody.com"]
+
+
+def test_invalidate_drops_local_entries_in_other_workers(redis_client):
+    supabase = FakeSupabase([{"id": 1, "domain": "acme.com", "name": "Acme"}])
+    worker_a = make_cache(supabase, redis_client)
+    worker_b = make_cache(supabase, redis_client)
+    asyncio.run(worker_a.resolve("acme.com"))
+    asyncio.run(worker_b.resolve("acme.com"))
+
+    supabase.rows[0]["name"] = "Acme Corp"
+    worker_a.invalidate("acme.com")
+
+    assert asyncio.run(worker_b.resolve("acme.com"))["name"] == "Acme Corp"
+    assert asyncio.run(worker_a.resolve("acme.com"))["name"] == "Acme Corp"
+
+
+def test_sync_changes_invalidates_changed_domains_once(redis_client):
+    supabase = FakeSupabase([{"id": 1, "domain": "acme.com", "name": "Acme"}])
+    worker_a = make_cache(supabase, redis_client)
+    worker_b = make_cache(supabase, redis_client)
+    assert asyncio.run(worker_a.resolve("acme.com"))["name"] == "Acme"
+    assert asyncio.run(worker_b.resolve("newco.com")) is None
+
+    supabase.rows[0]["name"] = "Acme Corp"
+    supabase.rows.append({"id": 2, "domain": "newco.com", "name": "NewCo"})
+    supabase.changes.extend([{"id": 1, "domain": "acme.com"}, {"id": 2, "domain": "newco.com"}])
+
+    assert asyncio.run(worker_a.sync_changes()) == 2
+    assert asyncio.run(worker_b.sync_changes()) == 0
+    assert asyncio.run(worker_b.resolve("acme.com"))["name"] == "Acme Corp"
+    assert asyncio.run(worker_b.resolve("newco.com"))["name"] == "NewCo"
@@ -0,0 +1,68 @@
+import pytest
+
+from pagination import decode_cursor, decode_timestamp_cursor, encode_cursor, etag_matches, http_date, make_etag, not_modified_since
+
+
+def test_cursor_round_trip_is_url_safe():
+    position = {"id": "0b6f5c1e-7a1d-4b8e-9b1a-2f3c4d5e6f70", "created_at": "2024-01-15T10:30:00+00:00"}
+    cursor = encode_cursor(position)
+
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+    assert decode_cursor(cursor) == position
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", encode_cursor([1, 2]), "e30"[:-1]])
+def test_decode_rejects_malformed_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_etag_is_weak_and_depends_on_all_parts():
+    etag = make_etag("org", "notion", 50, "", 10)
+    assert etag.startswith('W/"')
+    assert etag == make_etag("org", "notion", 50, "", 10)
+    assert etag != make_etag("org", "notion", 50, "", 11)
+
+
+def test_etag_matching_ignores_weakness_and_supports_lists():
+    etag = make_etag("org", 1)
+    bare = etag[2:]
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(bare, etag)
+    assert etag_matches(f'W/"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_http_date_and_if_modified_since():
+    last_synced = "2024-01-15T10:30:00.123456+00:00"
+    header = http_date(last_synced)
+
+    assert header == "Mon, 15 Jan 2024 10:30:00 GMT"
+    assert http_date(None) is None and http_date("yesterday") is None
+    # Дробові секунди не роблять ресурс "новішим" за власний Last-Modified
+    assert not_modified_since(header, last_synced)
+    assert not not_modified_since("Mon, 15 Jan 2024 10:29:59 GMT", last_synced)
+    assert not not_modified_since("garbage", last_synced)
+
+
+def test_timestamp_cursor_normalizes_values():
+    employee_id = "0B6F5C1E-7A1D-4B8E-9B1A-2F3C4D5E6F70"
+    cursor = encode_cursor({"created_at": "2024-01-15T10:30:00.123456+00:00", "employee_id": employee_id})
+
+    assert decode_timestamp_cursor(cursor, "created_at", "employee_id") == {
+        "created_at": "2024-01-15T10:30:00.123456+00:00",
+        "employee_id": employee_id.lower(),
+    }
+
+
+@pytest.mark.parametrize("position", [
+    {"created_at": '2024-01-15",id.gt.0', "employee_id": "0b6f5c1e-7a1d-4b8e-9b1a-2f3c4d5e6f70"},
+    {"created_at": "2024-01-15T10:30:00+00:00", "employee_id": "1),or(role.eq.admin"},
+    {"created_at": "2024-01-15T10:30:00+00:00"},
+])
+def test_timestamp_cursor_rejects_filter_injection(position):
+    with pytest.raises(ValueError):
+        decode_timestamp_cursor(encode_cursor(position), "created_at", "employee_id")
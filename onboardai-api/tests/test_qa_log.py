@@ -0,0 +1,99 @@
+import asyncio
+import uuid
+
+from qa_log import QAInteractionLog
+
+EMPLOYEE = str(uuid.uuid4())
+UNKNOWN = str(uuid.uuid4())
+
+
+class FakeSupabase:
+    """qa_interactions з FK на employees; down=True - база недоступна"""
+
+    def __init__(self, employees=(EMPLOYEE,)):
+        self.employees = set(employees)
+        self.rows = []
+        self.down = False
+
+    def table(self, name):
+        return self
+
+    def insert(self, rows):
+        self._pending = rows
+        return self
+
+    def execute(self):
+        if self.down:
+            raise ConnectionError("supabase unavailable")
+        for row in self._pending:
+            if row["employee_id"] is not None and row["employee_id"] not in self.employees:
+                raise ValueError("violates foreign key constraint")
+        self.rows.extend(self._pending)
+
+
+def record(log, employee_id=None, question="Як отримати доступ до VPN?"):
+    log.record(question, "Відповідь", 0.9, ["kb"], "developer", "vector", 12.5, employee_id)
+
+
+def make_log(supabase, **settings):
+    log = QAInteractionLog(supabase)
+    for name, value in settings.items():
+        setattr(log, name, value)
+    return log
+
+
+def test_invalid_employee_id_is_stored_as_null():
+    supabase = FakeSupabase()
+    log = make_log(supabase)
+    record(log, "not-a-uuid")
+    record(log, EMPLOYEE.upper())
+
+    assert asyncio.run(log.flush()) == 2
+    assert [row["employee_id"] for row in supabase.rows] == [None, EMPLOYEE]
+
+
+def test_unknown_employee_does_not_block_batch():
+    supabase = FakeSupabase()
+    log = make_log(supabase)
+    record(log, EMPLOYEE, "q1")
+    record(log, UNKNOWN, "q2")
+    record(log, None, "q3")
+
+    assert asyncio.run(log.flush()) == 3
+    assert not log._buffer
+    assert {row["question"]: row["employee_id"] for row in supabase.rows} == {"q1": EMPLOYEE, "q2": None, "q3": None}
+    assert all("_attempts" not in row for row in supabase.rows)
+
+
+def test_outage_requeues_batch_until_max_attempts():
+    supabase = FakeSupabase()
+    supabase.down = True
+    log = make_log(supabase, max_attempts=2)
+    record(log, EMPLOYEE)
+
+    assert asyncio.run(log.flush()) == 0
+    assert len(log._buffer) == 1
+    assert asyncio.run(log.flush()) == 0
+    assert not log._buffer
+
+    record(log, EMPLOYEE)
+    supabase.down = False
+    assert asyncio.run(log.flush()) == 1
+    assert len(supabase.rows) == 1
+
+
+def test_stop_waits_for_worker_and_drains_buffer():
+    supabase = FakeSupabase()
+
+    async def scenario():
+        log = make_log(supabase, flush_seconds=60.0, batch_size=2)
+        log.start()
+        for index in range(5):
+            record(log, EMPLOYEE, f"q{index}")
+        await asyncio.sleep(0)
+        await log.stop()
+        return log
+
+    log = asyncio.run(scenario())
+    assert not log._buffer
+    assert sorted(row["question"] for row in supabase.rows) == [f"q{index}" for index in range(5)]
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from rate_limiter import BULK, INTERACTIVE, OpenAIRateLimiter
+from resilience import BudgetExhaustedError, reset_request_budget, start_request_budget
+
+MODEL = "test-model"
+NOW = 1_700_000_000_000
+
+
+@pytest.fixture
+def limiter(redis_client, monkeypatch):
+    monkeypatch.setenv("OPENAI_RPM_TEST_MODEL", "10")
+    monkeypatch.setenv("OPENAI_TPM_TEST_MODEL", "1000")
+    return OpenAIRateLimiter(redis_client)
+
+
+def take(limiter, priority=INTERACTIVE, cost=1, now=NOW):
+    allowed, wait_ms = limiter._acquire(
+        keys=limiter._keys(MODEL),
+        args=[now, 10, 1000, cost, priority, limiter.bulk_reserve, limiter.waiting_ttl_ms],
+    )
+    return bool(allowed), int(wait_ms)
+
+
+def test_interactive_drains_bucket_then_waits_for_refill(limiter):
+    assert all(take(limiter)[0] for _ in range(10))
+    allowed, wait_ms = take(limiter)
+    assert not allowed
+    # 10 запитів/хв - один запит поповнюється за 6 с
+    assert 5900 <= wait_ms <= 6000
+    assert take(limiter, now=NOW + 6000)[0]
+
+
+def test_bulk_keeps_reserve_for_interactive(limiter):
+    granted = 0
+    while take(limiter, BULK)[0]:
+        granted += 1
+    assert granted == 8
+    assert take(limiter, INTERACTIVE)[0]
+
+
+def test_bulk_yields_while_interactive_is_waiting(limiter):
+    for _ in range(10):
+        take(limiter)
+    assert not take(limiter, INTERACTIVE)[0]
+
+    # Поповнення вистачило б для bulk, але interactive виклик уже чекає на квоту
+    allowed, wait_ms = take(limiter, BULK, now=NOW + 60000)
+    assert not allowed and wait_ms > 0
+
+
+def test_token_bucket_limits_large_requests(limiter):
+    assert take(limiter, cost=900)[0]
+    allowed, wait_ms = take(limiter, cost=200)
+    assert not allowed
+    assert wait_ms == pytest.approx(100 * 60000 / 1000, abs=1)
+
+
+def test_rate_limited_pauses_all_callers(limiter):
+    limiter.rate_limited(MODEL, retry_after=2.0)
+    allowed, wait_ms = take(limiter)
+    assert not allowed and 0 < wait_ms <= 2000
+
+
+def test_acquire_caps_cost_and_settles_actual_usage(limiter, redis_client):
+    reserved = asyncio.run(limiter.acquire(MODEL, 5000, BULK))
+    assert reserved == 800  # bulk не може зайняти резерв interactive
+
+    limiter.settle(MODEL, reserved, 300)
+    assert float(redis_client.hget(f"openai_rl:{MODEL}", "tok")) >= 600
+
+
+def test_settle_without_usage_refunds_reservation(limiter, redis_client):
+    reserved = asyncio.run(limiter.acquire(MODEL, 500))
+    assert float(redis_client.hget(f"openai_rl:{MODEL}", "tok")) <= 500 + 1
+
+    limiter.settle(MODEL, reserved, 0)
+    assert float(redis_client.hget(f"openai_rl:{MODEL}", "tok")) >= 1000
+
+
+def test_acquire_respects_request_budget(limiter):
+    limiter.rate_limited(MODEL, retry_after=30.0)
+
+    async def within_budget():
+        token = start_request_budget(0.1)
+        try:
+            await limiter.acquire(MODEL, 1)
+        finally:
+            reset_request_budget(token)
+
+    with pytest.raises(BudgetExhaustedError):
+        asyncio.run(within_budget())
@@ -0,0 +1,196 @@
+import asyncio
+
+import pytest
+
+from resilience import (
+    BudgetExhaustedError,
+    CircuitBreaker,
+    CircuitOpenError,
+    cancel_background_tasks,
+    reset_request_budget,
+    run_in_background,
+    start_request_budget,
+)
+
+
+async def succeed():
+    return "ok"
+
+
+async def fail():
+    raise RuntimeError("upstream error")
+
+
+async def hang():
+    await asyncio.sleep(10)
+
+
+def call(breaker, operation, **kwargs):
+    return asyncio.run(breaker.call(operation, **kwargs))
+
+
+def make_breaker(**settings):
+    defaults = {"timeout": 1.0, "min_calls": 4, "failure_ratio": 0.5, "open_seconds": 30.0}
+    return CircuitBreaker("test", **{**defaults, **settings})
+
+
+def test_opens_after_failure_ratio_in_window():
+    breaker = make_breaker()
+    for _ in range(2):
+        assert call(breaker, succeed) == "ok"
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            call(breaker, fail)
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        call(breaker, succeed)
+
+
+def test_stays_closed_below_min_calls():
+    breaker = make_breaker(min_calls=10)
+    for _ in range(5):
+        with pytest.raises(RuntimeError):
+            call(breaker, fail)
+    assert breaker.state == "closed"
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = make_breaker(open_seconds=0.0)
+    breaker._open(0.0)
+
+    with pytest.raises(RuntimeError):
+        call(breaker, fail)
+    assert breaker.state == "open"
+
+    assert call(breaker, succeed) == "ok"
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["window_calls"] == 0
+
+
+def test_half_open_allows_single_probe():
+    breaker = make_breaker(open_seconds=0.0)
+    breaker._open(0.0)
+    assert breaker.allow() is True
+    assert breaker.state == "half_open"
+    assert breaker.allow() is False
+    assert breaker.available() is False
+
+
+def test_slow_calls_count_as_failures():
+    breaker = make_breaker(slow_call_seconds=0.01, min_calls=2)
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    call(breaker, slow)
+    call(breaker, slow)
+    assert breaker.state == "open"
+
+
+def test_own_timeout_is_recorded_as_failure():
+    breaker = make_breaker(min_calls=1)
+    with pytest.raises(asyncio.TimeoutError) as error:
+        call(breaker, hang, timeout=0.01)
+    assert not isinstance(error.value, BudgetExhaustedError)
+    assert breaker.state == "open"
+
+
+def test_ignored_errors_are_not_dependency_failures():
+    breaker = make_breaker(min_calls=1)
+
+    with pytest.raises(RuntimeError):
+        call(breaker, fail, ignore=(RuntimeError,))
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["window_calls"] == 0
+
+
+def test_request_budget_timeout_is_not_a_dependency_failure():
+    breaker = make_breaker(min_calls=1)
+
+    async def within_budget():
+        token = start_request_budget(0.01)
+        try:
+            await breaker.call(hang)
+        finally:
+            reset_request_budget(token)
+
+    with pytest.raises(BudgetExhaustedError):
+        asyncio.run(within_budget())
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["window_calls"] == 0
+
+
+def test_budget_timeout_releases_half_open_probe():
+    breaker = make_breaker(open_seconds=0.0)
+    breaker._open(0.0)
+
+    async def within_budget():
+        token = start_request_budget(0.01)
+        try:
+            await breaker.call(hang)
+        finally:
+            reset_request_budget(token)
+
+    with pytest.raises(BudgetExhaustedError):
+        asyncio.run(within_budget())
+    assert breaker.state == "half_open"
+    assert breaker.available() is True
+
+
+def test_exhausted_budget_fails_fast_without_calling():
+    breaker = make_breaker()
+    calls = []
+
+    async def tracked():
+        calls.append(1)
+
+    async def without_budget():
+        token = start_request_budget(0)
+        try:
+            await breaker.call(tracked)
+        finally:
+            reset_request_budget(token)
+
+    with pytest.raises(BudgetExhaustedError):
+        asyncio.run(without_budget())
+    assert calls == []
+
+
+def test_background_task_does_not_inherit_request_budget():
+    breaker = make_breaker()
+
+    async def handler():
+        token = start_request_budget(0.01)
+        try:
+            task = run_in_background(breaker.call(slow_success, timeout=1.0))
+        finally:
+            reset_request_budget(token)
+        return await task
+
+    async def slow_success():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    assert asyncio.run(handler()) == "done"
+
+
+def test_shutdown_cancels_and_awaits_background_tasks():
+    cancelled = []
+
+    async def forever():
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def lifecycle():
+        task = run_in_background(forever())
+        await asyncio.sleep(0)
+        await cancel_background_tasks()
+        return task
+
+    task = asyncio.run(lifecycle())
+    assert task.cancelled() and cancelled == [1]
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from vector_snapshot import SnapshotReader, SnapshotWriter, quantize_int8, validate_target
+
+
+def cosine(a, b):
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def test_quantize_int8_preserves_cosine_similarity():
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(32, 256)).astype(np.float32)
+    quantized, scales = quantize_int8(vectors)
+
+    assert quantized.dtype == np.int8 and scales.dtype == np.float32
+    assert np.abs(quantized).max() == 127
+    restored = quantized.astype(np.float32) * scales[:, None]
+    for original, approx in zip(vectors, restored):
+        assert cosine(original, approx) > 0.99
+
+
+def test_quantize_int8_handles_zero_vector():
+    quantized, scales = quantize_int8(np.zeros((1, 4), dtype=np.float32))
+    assert not quantized.any()
+    assert scales[0] == 1.0
+
+
+@pytest.mark.parametrize("quantize", ["float32", "int8"])
+def test_snapshot_round_trip(tmp_path, quantize):
+    pytest.importorskip("pyarrow")
+    rng = np.random.default_rng(3)
+    values = rng.normal(size=(5, 8)).astype(np.float32)
+    writer = SnapshotWriter(str(tmp_path), quantize)
+    writer.write(
+        [f"id-{i}" for i in range(5)],
+        values.tolist(),
+        [{"content": f"chunk {i}", "type": "document"} for i in range(5)],
+    )
+    manifest = writer.close({"embedding_model": "text-embedding-3-small"})
+    assert manifest["count"] == 5 and manifest["dimension"] == 8
+
+    records = [record for batch in SnapshotReader(str(tmp_path)).batches(2) for record in batch]
+    assert [record["id"] for record in records] == [f"id-{i}" for i in range(5)]
+    assert records[3]["metadata"] == {"content": "chunk 3", "type": "document"}
+    for original, record in zip(values, records):
+        assert cosine(original, np.asarray(record["values"])) > 0.99
+
+
+class FakeService:
+    def __init__(self, dimension=1536, model="text-embedding-3-small", shadow=None):
+        self.embedding_model = model
+        self._shadow = shadow
+        self.pc = SimpleNamespace(describe_index=lambda name: SimpleNamespace(dimension=dimension))
+
+    def shadow_index_state(self):
+        return self._shadow
+
+
+MANIFEST = {"dimension": 1536, "embedding_model": "text-embedding-3-small"}
+
+
+def test_validate_target_accepts_matching_index():
+    validate_target(FakeService(), MANIFEST, "knowledge", exists=True)
+
+
+def test_validate_target_rejects_dimension_mismatch():
+    with pytest.raises(ValueError, match="Розмірність"):
+        validate_target(FakeService(dimension=3072), MANIFEST, "knowledge", exists=True)
+
+
+def test_validate_target_rejects_model_mismatch_unless_allowed():
+    service = FakeService(model="text-embedding-3-large")
+    with pytest.raises(ValueError, match="моделлю"):
+        validate_target(service, MANIFEST, "new-index", exists=False)
+    validate_target(service, MANIFEST, "new-index", exists=False, allow_model_mismatch=True)
+
+
+def test_validate_target_uses_shadow_model_for_shadow_index():
+    shadow = {"index": "knowledge-v2", "model": "text-embedding-3-small"}
+    validate_target(FakeService(model="text-embedding-3-large", shadow=shadow), MANIFEST, "knowledge-v2", exists=True)
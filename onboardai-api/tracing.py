@@ -0,0 +1,80 @@
+"""
+OnboardAI Tracing - OpenTelemetry спани для API, VectorService та викликів MCP серверів
+"""
+
+import functools
+import os
+import logging
+
+# Лише легкий API; SDK та експортери імпортуються тільки якщо трейсинг увімкнено
+from opentelemetry import trace
+
+logger = logging.getLogger(__name__)
+
+# Конфігурація трейсингу
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")  # "otlp", "file" або "none"
+TRACING_FILE = os.getenv("TRACING_FILE", "/tmp/onboardai-traces.jsonl")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "onboardai-api")
+
+tracer = trace.get_tracer("onboardai")
+
+
+def _build_exporter():
+    """Створення експортера спанів згідно TRACING_EXPORTER"""
+    if TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        # Endpoint береться з OTEL_EXPORTER_OTLP_ENDPOINT (за замовчуванням localhost:4318)
+        return OTLPSpanExporter()
+    if TRACING_EXPORTER == "file":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        return ConsoleSpanExporter(
+            out=open(TRACING_FILE, "a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    return None
+
+
+def setup_tracing(app) -> bool:
+    """
+    Ініціалізація трейсингу для FastAPI додатку
+
+    Кожен хендлер отримує серверний спан, а всі виклики httpx (MCP сервери,
+    Supabase, OpenAI) - клієнтські спани із заголовком traceparent.
+    """
+    exporter = _build_exporter()
+    if exporter is None:
+        return False
+
+    try:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        trace.set_tracer_provider(provider)
+
+        FastAPIInstrumentor.instrument_app(app, excluded_urls="metrics,health,live,ready")
+        HTTPXClientInstrumentor().instrument()
+
+        logger.info(f"Трейсинг увімкнено ({TRACING_EXPORTER})")
+        return True
+
+    except Exception as e:
+        logger.error(f"Помилка ініціалізації трейсингу: {e}")
+        return False
+
+
+def traced(span_name: str):
+    """Декоратор, що обгортає async функцію в спан з назвою span_name"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(span_name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
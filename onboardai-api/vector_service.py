@@ -4,25 +4,110 @@ OnboardAI Vector Service - Векторизація корпоративної 
 
 import os
 import json
+import array
+import time
+import random
 import asyncio
-from typing import List, Dict, Optional, Tuple
+import hashlib
+import threading
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
 from datetime import datetime
 import logging
 
-import numpy as np
-import pandas as pd
-from pinecone import Pinecone, ServerlessSpec
-from openai import AsyncOpenAI
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.schema import Document
-from supabase import create_client, Client
 import redis
-import httpx
+
+from metrics import (
+    CHAT_COMPLETION_LATENCY,
+    EMBEDDING_LATENCY,
+    EMBEDDING_TOKENS,
+    INDEX_DUAL_READ_OVERLAP,
+    INDEX_QUERY_LATENCY,
+    VECTOR_COUNT,
+    VECTORIZATION_PROGRESS,
+    observe_supabase,
+    record_cache,
+)
+from tracing import traced
+from resilience import (
+    BudgetExhaustedError,
+    CircuitOpenError,
+    breakers,
+    reset_request_budget,
+    run_in_background,
+    start_request_budget,
+)
+from rate_limiter import BULK, INTERACTIVE, OpenAIRateLimiter, estimate_tokens, retry_after_seconds
+
+# Важкі залежності (openai, pinecone, langchain, supabase) імпортуються при першому використанні,
+# щоб імпорт модуля не затримував старт API
+if TYPE_CHECKING:
+    from langchain.schema import Document
 
 # Логування
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Кеші семантичного пошуку в Redis
+SEARCH_GENERATION_KEY = "vector_cache:generation"
+EMBEDDING_CACHE_PREFIX = "vector_cache:embedding:"
+SEARCH_CACHE_PREFIX = "vector_cache:search:"
+
+# Версіоновані індекси: аліас активного індексу та тіньовий індекс міграції моделі embeddings
+ACTIVE_INDEX_KEY = "vector_index:active"
+SHADOW_INDEX_KEY = "vector_index:shadow"
+DUAL_READ_STATS_KEY = "vector_index:dual_read"
+
+# Межі MMR: Pinecone повертає не більше 1000 результатів разом з векторами (include_values)
+MMR_MAX_CANDIDATES = 1000
+MMR_MAX_CANDIDATE_MULTIPLIER = 20
+
+# Розмірність embeddings за замовчуванням для моделей OpenAI
+EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-large": 3072,
+    "text-embedding-3-small": 1536,
+    "text-embedding-ada-002": 1536,
+}
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def mmr_select(query_vector: List[float], candidate_vectors: List[List[float]], k: int, mmr_lambda: float) -> List[int]:
+    """
+    Maximal marginal relevance: індекси k кандидатів, релевантних запиту і несхожих між собою
+
+    mmr_lambda=1 - лише релевантність, 0 - лише різноманітність.
+    """
+    import numpy as np
+    
+    candidates = np.asarray(candidate_vectors, dtype=np.float32)
+    if len(candidates) == 0 or k <= 0:
+        return []
+    query = np.asarray(query_vector, dtype=np.float32)
+    
+    # Косинусна схожість через нормалізовані вектори - одне множення матриць на весь набір
+    candidates /= np.linalg.norm(candidates, axis=1, keepdims=True) + 1e-12
+    query /= np.linalg.norm(query) + 1e-12
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+    
+    selected = [int(np.argmax(relevance))]
+    max_similarity = pairwise[selected[0]].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+    
+    while len(selected) < min(k, len(candidates)):
+        scores = mmr_lambda * relevance - (1 - mmr_lambda) * max_similarity
+        scores[~available] = -np.inf
+        chosen = int(np.argmax(scores))
+        selected.append(chosen)
+        available[chosen] = False
+        np.maximum(max_similarity, pairwise[chosen], out=max_similarity)
+    
+    return selected
+
+
 class VectorService:
     """Сервіс для векторізації та семантичного пошуку корпоративної інформації"""
     
@@ -37,48 +122,158 @@ class VectorService:
         
         # Параметри векторізації
         self.embedding_model = os.getenv("EMBEDDING_MODEL", "text-embedding-3-large")
+        self.embedding_dimension = int(os.getenv("EMBEDDING_DIMENSION", EMBEDDING_DIMENSIONS.get(self.embedding_model, 3072)))
         self.chunk_size = int(os.getenv("CHUNK_SIZE", "1000"))
         self.chunk_overlap = int(os.getenv("CHUNK_OVERLAP", "200"))
         self.max_tokens = int(os.getenv("MAX_TOKENS", "4000"))
+        self.embedding_batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+        self.rate_limit_retries = int(os.getenv("OPENAI_RATE_LIMIT_RETRIES", "3"))
+        self.semantic_cache_ttl = int(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+        self.embedding_cache_ttl = int(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+        self.vectorization_budget_seconds = float(os.getenv("VECTORIZATION_BUDGET_SECONDS", "1800"))
         
-        # Ініціалізація клієнтів
-        self.supabase = create_client(self.supabase_url, self.supabase_key)
-        self.redis_client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
-        self.openai_client = AsyncOpenAI(api_key=self.openai_api_key)
+        # MMR перевпорядкування контексту (сусідні chunks з overlap часто майже однакові)
+        self.mmr_enabled = os.getenv("MMR_ENABLED", "false").lower() == "true"
+        self.mmr_candidate_multiplier = int(os.getenv("MMR_CANDIDATE_MULTIPLIER", "4"))
+        self.mmr_lambda = float(os.getenv("MMR_LAMBDA", "0.5"))
         
-        # Ініціалізація Pinecone
-        self.pc = Pinecone(api_key=self.pinecone_api_key)
+        # Дедуплікація майже однакових chunks перед embeddings
+        self.dedup_enabled = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+        self.dedup_threshold = float(os.getenv("DEDUP_JACCARD_THRESHOLD", "0.8"))
+        self.dedup_max_sources = int(os.getenv("DEDUP_MAX_SOURCES_PER_VECTOR", "32"))
+        self.dedup_max_metadata_bytes = int(os.getenv("DEDUP_MAX_METADATA_BYTES", "32768"))
+        
+        # Аліас активного індексу (перечитується з Redis не частіше alias_refresh_seconds) та dual-read
+        self.alias_refresh_seconds = float(os.getenv("INDEX_ALIAS_REFRESH_SECONDS", "5"))
+        self.dual_read_sample_rate = float(os.getenv("DUAL_READ_SAMPLE_RATE", "0"))
+        self._alias_checked_at = 0.0
+        
+        # Redis клієнт не з'єднується до першої команди; решта клієнтів створюється ліниво
+        self.redis_client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+        self.rate_limiter = OpenAIRateLimiter(self.redis_client)
         self.index = None
         
-        # Ініціалізація text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", " ", "。"],
+        self._clients: Dict[str, object] = {}
+        self._clients_lock = threading.Lock()
+    
+    def _client(self, name: str, factory):
+        """Створення клієнта при першому зверненні (потокобезпечно - warm_up виконується в потоці)"""
+        client = self._clients.get(name)
+        if client is None:
+            with self._clients_lock:
+                client = self._clients.get(name)
+                if client is None:
+                    client = factory()
+                    self._clients[name] = client
+        return client
+    
+    @property
+    def supabase(self):
+        def factory():
+            from supabase import create_client
+            return create_client(self.supabase_url, self.supabase_key)
+        return self._client("supabase", factory)
+    
+    @property
+    def openai_client(self):
+        def factory():
+            from openai import AsyncOpenAI
+            # Повтори після 429 координує спільний rate limiter, а не клієнт кожного процесу окремо
+            return AsyncOpenAI(
+                api_key=self.openai_api_key,
+                max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "0"))
+            )
+        return self._client("openai", factory)
+    
+    @property
+    def pc(self):
+        def factory():
+            from pinecone import Pinecone
+            return Pinecone(api_key=self.pinecone_api_key)
+        return self._client("pinecone", factory)
+    
+    @property
+    def text_splitter(self):
+        def factory():
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+            return RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                length_function=len,
+                separators=["\n\n", "\n", " ", "。"],
+            )
+        return self._client("text_splitter", factory)
+    
+    def warm_up(self):
+        """Створення всіх клієнтів (блокуюче - викликається у фоновому потоці після старту API)"""
+        for name in ("supabase", "openai_client", "pc", "text_splitter"):
+            getattr(self, name)
+    
+    def refresh_active_index(self, force: bool = False):
+        """
+        Застосування аліасу активного індексу з Redis (індекс, модель і розмірність embeddings)
+        
+        Без аліасу використовуються PINECONE_INDEX_NAME та EMBEDDING_MODEL з env.
+        """
+        now = time.monotonic()
+        if not force and now - self._alias_checked_at < self.alias_refresh_seconds:
+            return
+        self._alias_checked_at = now
+        try:
+            raw = self.redis_client.get(ACTIVE_INDEX_KEY)
+        except Exception as e:
+            logger.warning(f"Аліас активного індексу недоступний: {e}")
+            return
+        if not raw:
+            return
+        active = json.loads(raw)
+        if active["index"] != self.pinecone_index_name:
+            logger.info(f"Активний індекс: {active['index']} ({active['model']})")
+            self.pinecone_index_name = active["index"]
+            self.index = None
+        self.embedding_model = active["model"]
+        self.embedding_dimension = active["dimension"]
+    
+    def shadow_index_state(self) -> Optional[Dict]:
+        """Стан тіньового індексу міграції (None якщо міграції немає)"""
+        try:
+            raw = self.redis_client.get(SHADOW_INDEX_KEY)
+        except Exception as e:
+            logger.warning(f"Стан тіньового індексу недоступний: {e}")
+            return None
+        return json.loads(raw) if raw else None
+    
+    async def ensure_index(self, name: str, dimension: int):
+        """Створення індексу, якщо його немає, з очікуванням готовності"""
+        from pinecone import ServerlessSpec
+        
+        existing_indexes = [index.name for index in self.pc.list_indexes()]
+        if name in existing_indexes:
+            return
+        
+        logger.info(f"Створюємо новий Pinecone індекс: {name} (розмірність {dimension})")
+        self.pc.create_index(
+            name=name,
+            dimension=dimension,
+            metric='cosine',
+            spec=ServerlessSpec(
+                cloud='aws',
+                region=self.pinecone_environment
+            )
         )
+        
+        # Чекаємо поки індекс буде готовий
+        for _ in range(60):
+            if self.pc.describe_index(name).status["ready"]:
+                break
+            await asyncio.sleep(2)
     
+    @traced("vector.initialize_index")
     async def initialize_index(self):
         """Ініціалізація Pinecone індексу"""
         try:
-            # Перевіряємо чи існує індекс
-            existing_indexes = [index.name for index in self.pc.list_indexes()]
-            
-            if self.pinecone_index_name not in existing_indexes:
-                logger.info(f"Створюємо новий Pinecone індекс: {self.pinecone_index_name}")
-                
-                self.pc.create_index(
-                    name=self.pinecone_index_name,
-                    dimension=3072,  # text-embedding-3-large має 3072 розмірності
-                    metric='cosine',
-                    spec=ServerlessSpec(
-                        cloud='aws',
-                        region=self.pinecone_environment
-                    )
-                )
-                
-                # Чекаємо поки індекс буде готовий
-                await asyncio.sleep(10)
+            self.refresh_active_index(force=True)
+            await self.ensure_index(self.pinecone_index_name, self.embedding_dimension)
             
             self.index = self.pc.Index(self.pinecone_index_name)
             logger.info(f"Pinecone індекс {self.pinecone_index_name} готовий!")
@@ -88,22 +283,74 @@ class VectorService:
             logger.error(f"Помилка ініціалізації Pinecone: {e}")
             return False
     
-    async def create_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Створення embeddings для списку текстів"""
+    async def _call_openai(self, model: str, tokens: int, priority: str, breaker: str, operation, timeout: Optional[float] = None):
+        """
+        Виклик OpenAI через спільний rate limiter та circuit breaker; 429 призупиняє модель для всіх процесів
+
+        Резерв токенів повертається, якщо виклик не дав відповіді; 429 не рахується збоєм breaker-а.
+        """
+        from openai import RateLimitError
+        
+        for attempt in range(self.rate_limit_retries + 1):
+            reserved = await self.rate_limiter.acquire(model, tokens, priority)
+            try:
+                response = await breakers[breaker].call(operation, timeout=timeout, ignore=(RateLimitError,))
+            except RateLimitError as e:
+                # Відхилений запит не витратив токени - резерв повертається в bucket
+                self.rate_limiter.settle(model, reserved, 0)
+                self.rate_limiter.rate_limited(model, retry_after_seconds(e))
+                if attempt == self.rate_limit_retries:
+                    raise
+                continue
+            except BaseException:
+                self.rate_limiter.settle(model, reserved, 0)
+                raise
+            usage = getattr(response, "usage", None)
+            self.rate_limiter.settle(model, reserved, usage.total_tokens if usage else None)
+            return response
+    
+    @traced("vector.create_embeddings")
+    async def create_embeddings(
+        self,
+        texts: List[str],
+        timeout: Optional[float] = None,
+        priority: str = INTERACTIVE,
+        model: Optional[str] = None
+    ) -> List[List[float]]:
+        """Створення embeddings для списку текстів (батчами, через rate limiter та circuit breaker)"""
+        model = model or self.embedding_model
         try:
-            response = await self.openai_client.embeddings.create(
-                model=self.embedding_model,
-                input=texts,
-                encoding_format="float"
-            )
+            embeddings = []
+            for i in range(0, len(texts), self.embedding_batch_size):
+                batch = texts[i:i + self.embedding_batch_size]
+                with EMBEDDING_LATENCY.labels(model).time():
+                    response = await self._call_openai(
+                        model,
+                        sum(estimate_tokens(text) for text in batch),
+                        priority,
+                        "openai_embeddings",
+                        lambda: self.openai_client.embeddings.create(
+                            model=model,
+                            input=batch,
+                            encoding_format="float"
+                        ),
+                        timeout=timeout
+                    )
+                
+                if response.usage:
+                    EMBEDDING_TOKENS.labels(model).inc(response.usage.total_tokens)
+                
+                embeddings.extend(embedding.embedding for embedding in response.data)
             
-            return [embedding.embedding for embedding in response.data]
+            return embeddings
             
+        except (CircuitOpenError, BudgetExhaustedError):
+            raise
         except Exception as e:
             logger.error(f"Помилка створення embeddings: {e}")
             return []
     
-    def chunk_document(self, content: str, metadata: Dict = None) -> List[Document]:
+    def chunk_document(self, content: str, metadata: Dict = None) -> List["Document"]:
         """Розбивка документа на chunks"""
         try:
             documents = self.text_splitter.create_documents(
@@ -118,6 +365,7 @@ class VectorService:
             logger.error(f"Помилка розбивки документа: {e}")
             return []
     
+    @traced("vector.analyze_supabase_schema")
     async def analyze_supabase_schema(self) -> Dict[str, any]:
         """Аналіз схеми Supabase для отримання інформації про структуру"""
         try:
@@ -130,19 +378,22 @@ class VectorService:
             }
             
             # Аналіз організацій
-            orgs_result = self.supabase.table("organizations").select("*").limit(100).execute()
+            with observe_supabase("organizations", "select"):
+                orgs_result = self.supabase.table("organizations").select("*").limit(100).execute()
             if orgs_result.data:
                 schema_info["organizations"] = orgs_result.data
                 schema_info["total_records"] += len(orgs_result.data)
             
             # Аналіз інтеграцій
-            integrations_result = self.supabase.table("integrations").select("*").limit(100).execute()
+            with observe_supabase("integrations", "select"):
+                integrations_result = self.supabase.table("integrations").select("*").limit(100).execute()
             if integrations_result.data:
                 schema_info["integrations"] = integrations_result.data
                 schema_info["total_records"] += len(integrations_result.data)
             
             # Аналіз ресурсів
-            resources_result = self.supabase.table("resources").select("*").limit(100).execute()
+            with observe_supabase("resources", "select"):
+                resources_result = self.supabase.table("resources").select("*").limit(100).execute()
             if resources_result.data:
                 schema_info["resources"] = resources_result.data
                 schema_info["total_records"] += len(resources_result.data)
@@ -154,6 +405,7 @@ class VectorService:
             logger.error(f"Помилка аналізу схеми Supabase: {e}")
             return {"error": str(e)}
     
+    @traced("vector.extract_corporate_knowledge")
     async def extract_corporate_knowledge(self) -> List[Dict]:
         """Витягнення корпоративних знань з різних джерел"""
         knowledge_items = []
@@ -293,8 +545,20 @@ class VectorService:
             }
         ]
     
+    @traced("vector.vectorize_corporate_knowledge")
     async def vectorize_corporate_knowledge(self) -> Dict[str, any]:
-        """Головна функціЯ векторизації корпоративних знань"""
+        """
+        Головна функціЯ векторизації корпоративних знань
+
+        Замість бюджету HTTP запиту діє власний бюджет VECTORIZATION_BUDGET_SECONDS.
+        """
+        budget_token = start_request_budget(self.vectorization_budget_seconds)
+        try:
+            return await self._vectorize_corporate_knowledge()
+        finally:
+            reset_request_budget(budget_token)
+    
+    async def _vectorize_corporate_knowledge(self) -> Dict[str, any]:
         try:
             logger.info("Початок векторизації корпоративних знань...")
             
@@ -310,6 +574,8 @@ class VectorService:
             
             # Обробка кожного елемента знань
             processed_chunks = []
+            VECTORIZATION_PROGRESS.labels("chunking").set(0)
+            VECTORIZATION_PROGRESS.labels("upsert").set(0)
             
             for i, item in enumerate(knowledge_items):
                 # Розбивка на chunks
@@ -323,37 +589,60 @@ class VectorService:
                         "content": chunk.page_content,
                         "metadata": chunk.metadata
                     })
+                
+                VECTORIZATION_PROGRESS.labels("chunking").set((i + 1) / len(knowledge_items))
+            
+            # Дедуплікація: майже однакові chunks (шаблонні описи, що відрізняються назвою) - один вектор
+            unique_chunks = processed_chunks
+            if self.dedup_enabled:
+                from dedup import deduplicate_chunks
+                unique_chunks = await asyncio.to_thread(
+                    deduplicate_chunks, processed_chunks, self.dedup_threshold,
+                    self.dedup_max_sources, self.dedup_max_metadata_bytes
+                )
             
             # Створення embeddings
-            logger.info(f"Створення embeddings для {len(processed_chunks)} chunks...")
-            texts = [chunk["content"] for chunk in processed_chunks]
-            embeddings = await self.create_embeddings(texts)
+            logger.info(f"Створення embeddings для {len(unique_chunks)} chunks...")
+            texts = [chunk["content"] for chunk in unique_chunks]
+            embeddings = await self.create_embeddings(texts, timeout=300.0, priority=BULK)
             
-            # Підготовка даних для Pinecone
+            # Підготовка даних для Pinecone (текст chunk-а в metadata - з нього читає semantic_search)
             vectors_to_upsert = []
-            for i, (chunk, embedding) in enumerate(zip(processed_chunks, embeddings)):
+            for i, (chunk, embedding) in enumerate(zip(unique_chunks, embeddings)):
                 vectors_to_upsert.append({
                     "id": chunk["id"],
                     "values": embedding,
-                    "metadata": chunk["metadata"]
+                    "metadata": {**chunk["metadata"], "content": chunk["content"]}
                 })
             
             # Завантаження в Pinecone (батчами)
             batch_size = 100
             for i in range(0, len(vectors_to_upsert), batch_size):
                 batch = vectors_to_upsert[i:i + batch_size]
-                self.index.upsert(vectors=batch)
+                with INDEX_QUERY_LATENCY.labels("upsert").time():
+                    self.index.upsert(vectors=batch)
+                VECTORIZATION_PROGRESS.labels("upsert").set(min(i + batch_size, len(vectors_to_upsert)) / len(vectors_to_upsert))
                 logger.info(f"Завантажено batch {i//batch_size + 1}/{(len(vectors_to_upsert) + batch_size - 1)//batch_size}")
             
+            # Під час міграції моделі ті ж chunks записуються і в тіньовий індекс (його модель embeddings)
+            shadow = self.shadow_index_state()
+            if shadow:
+                await self.write_shadow(shadow, vectors_to_upsert, texts, batch_size)
+            
             # Оновлення кешу
             cache_key = "vectorization_stats"
             stats = {
                 "total_chunks": len(processed_chunks),
+                "unique_chunks": len(unique_chunks),
+                "dedup_ratio": round(1 - len(unique_chunks) / len(processed_chunks), 4) if processed_chunks else 0.0,
                 "vectors_stored": len(vectors_to_upsert),
                 "knowledge_items": len(knowledge_items),
                 "timestamp": datetime.now().isoformat()
             }
             self.redis_client.setex(cache_key, 3600, json.dumps(stats))
+            # Нове покоління індексу - закешовані результати пошуку більше не використовуються
+            self.redis_client.incr(SEARCH_GENERATION_KEY)
+            VECTOR_COUNT.set(len(vectors_to_upsert))
             
             logger.info(f"Векторизація завершена! Процесовано {len(processed_chunks)} chunks")
             
@@ -367,47 +656,220 @@ class VectorService:
             logger.error(f"Помилка векторизації: {e}")
             return {"error": str(e)}
     
-    async def semantic_search(self, query: str, role: str = None, limit: int = 5) -> List[Dict]:
-        """Семантичний пошук по корпоративним знанням"""
+    async def write_shadow(self, shadow: Dict, vectors: List[Dict], texts: List[str], batch_size: int):
+        embeddings = await self.create_embeddings(texts, timeout=300.0, priority=BULK, model=shadow["model"])
+        if len(embeddings) != len(vectors):
+            logger.error(f"Не вдалося записати chunks у тіньовий індекс {shadow['index']}")
+            return
+        shadow_index = self.pc.Index(shadow["index"])
+        for i in range(0, len(vectors), batch_size):
+            batch = [
+                {**vector, "values": embedding}
+                for vector, embedding in zip(vectors[i:i + batch_size], embeddings[i:i + batch_size])
+            ]
+            with INDEX_QUERY_LATENCY.labels("upsert").time():
+                shadow_index.upsert(vectors=batch)
+    
+    async def store_chunks(self, chunks: List[Dict], priority: str = BULK) -> int:
+        """Embeddings та запис батчу chunks ({id, content, metadata}) в активний і тіньовий індекси"""
+        if not self.index and not await self.initialize_index():
+            raise RuntimeError("Векторний індекс недоступний")
+        texts = [chunk["content"] for chunk in chunks]
+        embeddings = await self.create_embeddings(texts, timeout=300.0, priority=priority)
+        if len(embeddings) != len(chunks):
+            raise RuntimeError(f"Не вдалося створити embeddings для {len(chunks)} chunks")
+        
+        vectors = [
+            {"id": chunk["id"], "values": embedding, "metadata": {**chunk["metadata"], "content": chunk["content"]}}
+            for chunk, embedding in zip(chunks, embeddings)
+        ]
+        with INDEX_QUERY_LATENCY.labels("upsert").time():
+            await asyncio.to_thread(self.index.upsert, vectors=vectors)
+        shadow = self.shadow_index_state()
+        if shadow:
+            await self.write_shadow(shadow, vectors, texts, len(vectors))
+        return len(vectors)
+    
+    def delete_stale_chunks(self, document_id: str, chunk_count: int) -> int:
+        """Видалення chunks '<document_id>#<n>' попередньої версії документа з n >= chunk_count"""
+        if not self.index:
+            raise RuntimeError("Векторний індекс недоступний")
+        stale = []
+        for ids in self.index.list(prefix=f"{document_id}#"):
+            stale.extend(vector_id for vector_id in ids if int(vector_id.rsplit("#", 1)[1]) >= chunk_count)
+        for i in range(0, len(stale), 1000):
+            with INDEX_QUERY_LATENCY.labels("delete").time():
+                self.index.delete(ids=stale[i:i + 1000])
+        return len(stale)
+    
+    async def _query_embedding(self, query: str, priority: str, model: Optional[str] = None) -> Optional[List[float]]:
+        """Embedding запиту з кешу Redis (float32) або через OpenAI"""
+        model = model or self.embedding_model
+        key = f"{EMBEDDING_CACHE_PREFIX}{model}:{_digest(query)}"
+        try:
+            cached = self.redis_client.get(key)
+        except Exception as e:
+            logger.warning(f"Кеш embeddings недоступний: {e}")
+            cached = None
+        record_cache("query_embedding", cached is not None)
+        if cached is not None:
+            return array.array("f", cached).tolist()
+        
+        embeddings = await self.create_embeddings([query], priority=priority, model=model)
+        if not embeddings:
+            return None
+        try:
+            self.redis_client.setex(key, self.embedding_cache_ttl, array.array("f", embeddings[0]).tobytes())
+        except Exception as e:
+            logger.warning(f"Не вдалося закешувати embedding: {e}")
+        return embeddings[0]
+    
+    def _search_cache_key(self, query: str, role: Optional[str], limit: int, *options) -> Optional[str]:
+        try:
+            generation = int(self.redis_client.get(SEARCH_GENERATION_KEY) or 0)
+        except Exception as e:
+            logger.warning(f"Кеш семантичного пошуку недоступний: {e}")
+            return None
+        return f"{SEARCH_CACHE_PREFIX}{self.pinecone_index_name}:{generation}:{_digest(query, role, limit, *options)}"
+    
+    @staticmethod
+    def _expand_sources(match) -> List[Dict]:
+        """Усі джерела, які представляє вектор (після дедуплікації - кілька майже однакових записів)"""
+        metadata = match.metadata or {}
+        source_ids = metadata.get("source_ids")
+        if not source_ids:
+            reference = f"{metadata['table']}:{metadata['id']}" if metadata.get("table") and metadata.get("id") else match.id
+            return [{"id": reference, "name": metadata.get("name") or metadata.get("type", "")}]
+        names = metadata.get("source_names") or []
+        return [
+            {"id": source_id, "name": names[index] if index < len(names) else ""}
+            for index, source_id in enumerate(source_ids)
+        ]
+    
+    @traced("vector.semantic_search")
+    async def semantic_search(
+        self,
+        query: str,
+        role: str = None,
+        limit: int = 5,
+        priority: str = INTERACTIVE,
+        mmr: Optional[bool] = None,
+        candidate_multiplier: Optional[int] = None,
+        mmr_lambda: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Семантичний пошук по корпоративним знанням (з кешем результатів до наступної векторизації)
+        
+        З mmr=True з індексу береться limit * candidate_multiplier (не більше MMR_MAX_CANDIDATES) кандидатів разом з векторами,
+        і з них MMR обирає limit різноманітних результатів. Параметри за замовчуванням - MMR_* з env.
+        """
+        mmr = self.mmr_enabled if mmr is None else mmr
+        candidate_multiplier = min(
+            MMR_MAX_CANDIDATE_MULTIPLIER, max(1, candidate_multiplier or self.mmr_candidate_multiplier)
+        )
+        mmr_lambda = self.mmr_lambda if mmr_lambda is None else min(1.0, max(0.0, mmr_lambda))
+        self.refresh_active_index()
         try:
+            options = (candidate_multiplier, mmr_lambda) if mmr else ()
+            cache_key = self._search_cache_key(query, role, limit, *options)
+            cached = self.redis_client.get(cache_key) if cache_key else None
+            record_cache("semantic_search", cached is not None)
+            if cached is not None:
+                return json.loads(cached)
+            
             if not self.index:
                 await self.initialize_index()
             
             # Створення embedding для запиту
-            query_embedding = await self.create_embeddings([query])
+            query_embedding = await self._query_embedding(query, priority)
             if not query_embedding:
                 return []
             
             # Семантичний пошук
-            search_results = self.index.query(
-                vector=query_embedding[0],
-                top_k=limit,
-                include_metadata=True
-            )
+            started_at = time.perf_counter()
+            with INDEX_QUERY_LATENCY.labels("query").time():
+                search_results = await breakers["vector_index"].call(
+                    lambda: asyncio.to_thread(
+                        self.index.query,
+                        vector=query_embedding,
+                        top_k=min(limit * candidate_multiplier, MMR_MAX_CANDIDATES) if mmr else limit,
+                        include_metadata=True,
+                        include_values=mmr
+                    )
+                )
+            active_latency = time.perf_counter() - started_at
+            
+            matches = search_results.matches
+            
+            # Dual-read: частина запитів паралельно йде в тіньовий індекс для порівняння (не затримує відповідь)
+            if self.dual_read_sample_rate > 0 and random.random() < self.dual_read_sample_rate:
+                shadow = self.shadow_index_state()
+                if shadow:
+                    run_in_background(self._compare_shadow(
+                        shadow, query, limit, [match.id for match in matches[:limit]], active_latency
+                    ))
+            if mmr and len(matches) > limit:
+                selected = mmr_select(query_embedding, [match.values for match in matches], limit, mmr_lambda)
+                matches = [matches[index] for index in selected]
             
             # Обробка результатів
             results = []
-            for match in search_results.matches:
+            for match in matches:
                 result = {
                     "content": match.metadata.get("content", ""),
                     "metadata": match.metadata,
+                    "sources": self._expand_sources(match),
                     "similarity_score": match.score,
                     "relevance": "high" if match.score > 0.8 else "medium" if match.score > 0.6 else "low"
                 }
                 results.append(result)
             
             logger.info(f"Знайдено {len(results)} релевантних результатів для запиту: '{query}'")
+            if cache_key and results:
+                self.redis_client.setex(cache_key, self.semantic_cache_ttl, json.dumps(results, default=str))
             return results
             
+        except (CircuitOpenError, BudgetExhaustedError):
+            raise
         except Exception as e:
             logger.error(f"Помилка семантичного пошуку: {e}")
             return []
     
-    async def get_contextual_answer(self, question: str, role: str = "general") -> Dict:
+    async def _compare_shadow(self, shadow: Dict, query: str, limit: int, active_ids: List[str], active_latency: float):
+        """Запит до тіньового індексу та накопичення overlap@k і затримок у Redis та метриках"""
+        try:
+            query_embedding = await self._query_embedding(query, BULK, model=shadow["model"])
+            if not query_embedding:
+                return
+            started_at = time.perf_counter()
+            with INDEX_QUERY_LATENCY.labels("shadow_query").time():
+                shadow_results = await asyncio.to_thread(
+                    self.pc.Index(shadow["index"]).query,
+                    vector=query_embedding,
+                    top_k=limit,
+                    include_metadata=False
+                )
+            shadow_latency = time.perf_counter() - started_at
+            
+            shadow_ids = {match.id for match in shadow_results.matches}
+            overlap = len(shadow_ids & set(active_ids)) / max(1, len(active_ids))
+            INDEX_DUAL_READ_OVERLAP.observe(overlap)
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hincrby(DUAL_READ_STATS_KEY, "queries", 1)
+            pipe.hincrbyfloat(DUAL_READ_STATS_KEY, "overlap_sum", overlap)
+            pipe.hincrbyfloat(DUAL_READ_STATS_KEY, "active_latency_sum", active_latency)
+            pipe.hincrbyfloat(DUAL_READ_STATS_KEY, "shadow_latency_sum", shadow_latency)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Dual-read тіньового індексу не вдався: {e}")
+    
+    @traced("vector.get_contextual_answer")
+    async def get_contextual_answer(self, question: str, role: str = "general", priority: str = INTERACTIVE) -> Dict:
         """Отримання контекстуальної відповіді з використанням векторного пошуку"""
         try:
             # Пошук релевантного контенту
-            semantic_results = await self.semantic_search(question, role, limit=3)
+            semantic_results = await self.semantic_search(question, role, limit=3, priority=priority)
             
             if not semantic_results:
                 return {
@@ -428,7 +890,8 @@ class VectorService:
                         "content": result["metadata"].get("content", "")[:200] + "...",
                         "source": result["metadata"].get("source", "unknown"),
                         "type": result["metadata"].get("type", "unknown"),
-                        "similarity": result["similarity_score"]
+                        "similarity": result["similarity_score"],
+                        "references": result["sources"]
                     })
             
             if not context_chunks:
@@ -456,12 +919,19 @@ class VectorService:
             """
             
             # Використання OpenAI для генерації відповіді
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=self.max_tokens,
-                temperature=0.7
-            )
+            with CHAT_COMPLETION_LATENCY.labels("gpt-3.5-turbo").time():
+                response = await self._call_openai(
+                    "gpt-3.5-turbo",
+                    estimate_tokens(prompt) + self.max_tokens,
+                    priority,
+                    "openai_chat",
+                    lambda: self.openai_client.chat.completions.create(
+                        model="gpt-3.5-turbo",
+                        messages=[{"role": "user", "content": prompt}],
+                        max_tokens=self.max_tokens,
+                        temperature=0.7
+                    )
+                )
             
             answer = response.choices[0].message.content
             confidence = sum([r["similarity_score"] for r in semantic_results]) / len(semantic_results)
@@ -474,6 +944,9 @@ class VectorService:
                 "relevant_chunks": len(context_chunks)
             }
             
+        except (CircuitOpenError, BudgetExhaustedError):
+            # Залежність недоступна - викликач одразу переходить на fallback
+            raise
         except Exception as e:
             logger.error(f"Помилка генерації контекстуальної відповіді: {e}")
             return {
@@ -483,6 +956,7 @@ class VectorService:
                 "context_found": False
             }
     
+    @traced("vector.get_vectorization_status")
     async def get_vectorization_status(self) -> Dict:
         """Отримання статусу векторизації"""
         try:
@@ -497,7 +971,9 @@ class VectorService:
             if not self.index:
                 await self.initialize_index()
             
-            stats = self.index.describe_index_stats()
+            with INDEX_QUERY_LATENCY.labels("describe").time():
+                stats = self.index.describe_index_stats()
+            VECTOR_COUNT.set(stats.total_vector_count)
             
             return {
                 "index_name": self.pinecone_index_name,
@@ -0,0 +1,344 @@
+"""
+OnboardAI Vector Snapshot - Експорт/імпорт векторного індексу у компактний колонковий знімок
+
+Знімок - директорія:
+    manifest.json     кількість, розмірність, формат векторів, модель embeddings
+    vectors.f32       float32 матриця N x D (або vectors.i8 + scales.f32 для int8 квантування)
+    records.parquet   id, текст chunk-а та metadata (JSON) у тому ж порядку, що й рядки матриці
+
+Імпорт не звертається до OpenAI: вектори беруться зі знімка і завантажуються паралельними батчами.
+
+Використання:
+    python vector_snapshot.py export ./snapshots/knowledge --quantize int8
+    python vector_snapshot.py import ./snapshots/knowledge --index onboardai-knowledge-staging
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from metrics import INDEX_QUERY_LATENCY
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+RECORDS_FILE = "records.parquet"
+VECTOR_FILES = {"float32": "vectors.f32", "int8": "vectors.i8"}
+SCALES_FILE = "scales.f32"
+
+
+def _records_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.string()),
+        ("content", pa.string()),
+        ("metadata", pa.string()),
+    ])
+
+
+def quantize_int8(vectors):
+    """Симетричне int8 квантування з масштабом на вектор (косинусна схожість зберігається з точністю ~1%)"""
+    import numpy as np
+
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+class SnapshotWriter:
+    """Потоковий запис знімка: вектори дописуються у файл матриці, записи - row group-ами Parquet"""
+
+    def __init__(self, path: str, quantize: str = "float32"):
+        import pyarrow.parquet as pq
+
+        if quantize not in VECTOR_FILES:
+            raise ValueError(f"Невідомий формат векторів: {quantize}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.quantize = quantize
+        self.count = 0
+        self.dimension: Optional[int] = None
+
+        self._vectors = open(os.path.join(path, VECTOR_FILES[quantize]), "wb")
+        self._scales = open(os.path.join(path, SCALES_FILE), "wb") if quantize == "int8" else None
+        self._records = pq.ParquetWriter(os.path.join(path, RECORDS_FILE), _records_schema(), compression="zstd")
+
+    def write(self, ids: List[str], values: List[List[float]], metadata: List[Dict]):
+        import numpy as np
+        import pyarrow as pa
+
+        if not ids:
+            return
+        matrix = np.asarray(values, dtype=np.float32)
+        if self.dimension is None:
+            self.dimension = matrix.shape[1]
+        elif matrix.shape[1] != self.dimension:
+            raise ValueError(f"Розмірність {matrix.shape[1]} не збігається з {self.dimension}")
+
+        if self.quantize == "int8":
+            quantized, scales = quantize_int8(matrix)
+            self._vectors.write(quantized.tobytes())
+            self._scales.write(scales.tobytes())
+        else:
+            self._vectors.write(matrix.tobytes())
+
+        # Текст chunk-а - окрема колонка (стискається краще, ніж у складі JSON)
+        contents = [str((item or {}).get("content", "")) for item in metadata]
+        rest = [json.dumps({k: v for k, v in (item or {}).items() if k != "content"}, ensure_ascii=False) for item in metadata]
+        self._records.write_table(pa.Table.from_arrays(
+            [pa.array(ids), pa.array(contents), pa.array(rest)], schema=_records_schema()
+        ))
+        self.count += len(ids)
+
+    def close(self, extra: Optional[Dict] = None) -> Dict:
+        """Закриття файлів та запис manifest (лише після повного експорту - незавершений знімок не імпортується)"""
+        self._vectors.close()
+        if self._scales:
+            self._scales.close()
+        self._records.close()
+
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "count": self.count,
+            "dimension": self.dimension or 0,
+            "vector_format": self.quantize,
+            "created_at": datetime.now().isoformat(),
+            **(extra or {}),
+        }
+        with open(os.path.join(self.path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest
+
+
+class SnapshotReader:
+    """Потокове читання знімка батчами: матриця через memmap, записи - по row group-ах Parquet"""
+
+    def __init__(self, path: str):
+        import numpy as np
+
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Непідтримувана версія знімка: {self.manifest.get('format_version')}")
+
+        self.path = path
+        self.count = self.manifest["count"]
+        self.dimension = self.manifest["dimension"]
+        vector_format = self.manifest["vector_format"]
+
+        dtype = np.int8 if vector_format == "int8" else np.float32
+        self._vectors = (
+            np.memmap(os.path.join(path, VECTOR_FILES[vector_format]), dtype=dtype, mode="r", shape=(self.count, self.dimension))
+            if self.count else None
+        )
+        self._scales = (
+            np.memmap(os.path.join(path, SCALES_FILE), dtype=np.float32, mode="r", shape=(self.count,))
+            if vector_format == "int8" and self.count else None
+        )
+
+    def batches(self, batch_size: int) -> Iterator[List[Dict]]:
+        import numpy as np
+        import pyarrow.parquet as pq
+
+        offset = 0
+        for batch in pq.ParquetFile(os.path.join(self.path, RECORDS_FILE)).iter_batches(batch_size=batch_size):
+            rows = batch.to_pydict()
+            size = len(rows["id"])
+            values = np.asarray(self._vectors[offset:offset + size], dtype=np.float32)
+            if self._scales is not None:
+                values *= self._scales[offset:offset + size, None]
+            offset += size
+
+            records = []
+            for i in range(size):
+                metadata = json.loads(rows["metadata"][i] or "{}")
+                if rows["content"][i]:
+                    metadata["content"] = rows["content"][i]
+                records.append({"id": rows["id"][i], "values": values[i].tolist(), "metadata": metadata})
+            yield records
+
+
+def _iter_index_ids(index, page_size: int) -> Iterator[List[str]]:
+    """Сторінки ID усіх векторів індексу (list доступний для serverless індексів)"""
+    for ids in index.list(limit=page_size):
+        if ids:
+            yield list(ids)
+
+
+def export_snapshot(service, path: str, quantize: str = "float32", page_size: int = 100) -> Dict:
+    """Експорт усіх векторів індексу service.pinecone_index_name (без виклику OpenAI)"""
+    index = service.pc.Index(service.pinecone_index_name)
+    writer = SnapshotWriter(path, quantize)
+    for ids in _iter_index_ids(index, page_size):
+        with INDEX_QUERY_LATENCY.labels("fetch").time():
+            fetched = index.fetch(ids=ids).vectors
+        # fetch не гарантує порядок - зберігаємо порядок сторінки
+        present = [vector_id for vector_id in ids if vector_id in fetched]
+        writer.write(
+            present,
+            [fetched[vector_id].values for vector_id in present],
+            [fetched[vector_id].metadata or {} for vector_id in present],
+        )
+        logger.info(f"Експортовано {writer.count} векторів")
+
+    return writer.close({
+        "source_index": service.pinecone_index_name,
+        "embedding_model": service.embedding_model,
+    })
+
+
+def validate_target(service, manifest: Dict, index_name: str, exists: bool, allow_model_mismatch: bool = False):
+    """
+    Перевірка сумісності знімка з цільовим індексом до першого upsert
+
+    Розмірність має збігатися з існуючим індексом, а модель embeddings знімка - з моделлю,
+    якою сервіс запитує цей індекс (тіньовий індекс міграції - з моделлю міграції).
+    """
+    if exists:
+        dimension = service.pc.describe_index(index_name).dimension
+        if dimension != manifest["dimension"]:
+            raise ValueError(
+                f"Розмірність знімка {manifest['dimension']} не збігається з розмірністю індексу {index_name} ({dimension})"
+            )
+
+    shadow = service.shadow_index_state()
+    expected_model = shadow["model"] if shadow and shadow["index"] == index_name else service.embedding_model
+    snapshot_model = manifest.get("embedding_model")
+    if snapshot_model and snapshot_model != expected_model and not allow_model_mismatch:
+        raise ValueError(
+            f"Знімок створено моделлю {snapshot_model}, а індекс {index_name} запитується моделлю {expected_model}"
+        )
+
+
+async def import_snapshot(
+    service,
+    path: str,
+    index_name: Optional[str] = None,
+    batch_size: int = 100,
+    concurrency: int = 8,
+    allow_model_mismatch: bool = False,
+) -> Dict:
+    """
+    Завантаження знімка в індекс паралельними батчами (індекс створюється, якщо його немає)
+
+    Читання знімка потокове: у пам'яті одночасно не більше concurrency батчів.
+    """
+    from pinecone import ServerlessSpec
+
+    reader = SnapshotReader(path)
+    index_name = index_name or service.pinecone_index_name
+
+    exists = index_name in [index.name for index in service.pc.list_indexes()]
+    validate_target(service, reader.manifest, index_name, exists, allow_model_mismatch)
+    if not exists:
+        logger.info(f"Створюємо Pinecone індекс {index_name} (розмірність {reader.dimension})")
+        service.pc.create_index(
+            name=index_name,
+            dimension=reader.dimension,
+            metric="cosine",
+            spec=ServerlessSpec(cloud="aws", region=service.pinecone_environment),
+        )
+        while not service.pc.describe_index(index_name).status["ready"]:
+            await asyncio.sleep(2)
+    index = service.pc.Index(index_name)
+
+    start = time.monotonic()
+    semaphore = asyncio.Semaphore(concurrency)
+    pending = set()
+    errors: List[Exception] = []
+    uploaded = 0
+
+    async def upsert(batch: List[Dict]):
+        nonlocal uploaded
+        try:
+            with INDEX_QUERY_LATENCY.labels("upsert").time():
+                await asyncio.to_thread(index.upsert, vectors=batch)
+            uploaded += len(batch)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            semaphore.release()
+
+    for number, batch in enumerate(reader.batches(batch_size), start=1):
+        await semaphore.acquire()
+        if errors:
+            semaphore.release()
+            break
+        task = asyncio.create_task(upsert(batch))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        if number % 50 == 0:
+            logger.info(f"Імпортовано {uploaded}/{reader.count} векторів")
+    if pending:
+        await asyncio.gather(*pending)
+    if errors:
+        raise RuntimeError(f"Імпорт зупинено після {uploaded}/{reader.count} векторів: {errors[0]}")
+
+    # Нове покоління індексу - закешовані результати пошуку більше не використовуються
+    if index_name == service.pinecone_index_name:
+        from vector_service import SEARCH_GENERATION_KEY
+        try:
+            service.redis_client.incr(SEARCH_GENERATION_KEY)
+        except Exception as e:
+            logger.warning(f"Не вдалося скинути кеш семантичного пошуку: {e}")
+
+    return {
+        "index": index_name,
+        "vectors_imported": uploaded,
+        "dimension": reader.dimension,
+        "vector_format": reader.manifest["vector_format"],
+        "embedding_model": reader.manifest.get("embedding_model"),
+        "seconds": round(time.monotonic() - start, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Знімки векторного індексу OnboardAI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Експорт індексу у знімок")
+    export_parser.add_argument("path", help="Директорія знімка")
+    export_parser.add_argument("--quantize", choices=list(VECTOR_FILES), default="float32", help="Формат векторів")
+    export_parser.add_argument("--index", help="Індекс-джерело (за замовчуванням PINECONE_INDEX_NAME)")
+
+    import_parser = commands.add_parser("import", help="Імпорт знімка в індекс")
+    import_parser.add_argument("path", help="Директорія знімка")
+    import_parser.add_argument("--index", help="Цільовий індекс (за замовчуванням PINECONE_INDEX_NAME)")
+    import_parser.add_argument("--batch-size", type=int, default=100, help="Векторів в одному upsert")
+    import_parser.add_argument("--concurrency", type=int, default=8, help="Паралельних upsert")
+    import_parser.add_argument(
+        "--allow-model-mismatch", action="store_true", help="Імпорт знімка іншої моделі embeddings"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from vector_service import VectorService
+    service = VectorService()
+    # Активний індекс та модель embeddings - за аліасом (див. index_migration.py)
+    service.refresh_active_index(force=True)
+
+    try:
+        if args.command == "export":
+            if args.index:
+                service.pinecone_index_name = args.index
+            result = export_snapshot(service, args.path, args.quantize)
+        else:
+            result = asyncio.run(import_snapshot(
+                service, args.path, args.index, args.batch_size, args.concurrency, args.allow_model_mismatch
+            ))
+    except Exception as e:
+        print(f"❌ Помилка: {e}")
+        sys.exit(1)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()